@@ -1,12 +1,42 @@
+import time
+import logging
+import importlib
+import sys
+IMPORT_START = time.perf_counter()
 import streamlit as st
 import pandas as pd
-pd.options.mode.chained_assignment = None  # default='warn' 
-import numpy as np 
-import matplotlib.pyplot as plt
-import plotly.express as px
-import altair as alt
-import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
+import memo
+import data
+import figures
+import profiling
+import snapshot
+
+#plotting backends are imported by the section that draws with them, the first time it is rendered
+IMPORT_BUDGET = 1.5  #seconds of imports a worker may spend before the first chart, over this a warning is logged
+import_times = {"startup": time.perf_counter() - IMPORT_START}
+
+RERUN_START = time.perf_counter()
+TRACE = profiling.start_trace()  #spans of this rerun, shown by the debug panel
+log = logging.getLogger("app1")
+profiling.configure_logging("app1", "pipeline")  #the import report, the section timings and the stage times of a build
+
+#import a module on first use and record how long that took
+def lazy_import(name):
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        import_times[name] = time.perf_counter() - start
+        report_imports(name)
+    return module
+
+#log the import time spent so far and warn once it goes over IMPORT_BUDGET
+def report_imports(name):
+    total = sum(import_times.values())
+    level = logging.WARNING if total > IMPORT_BUDGET else logging.INFO
+    log.log(level, "imported %s in %.0f ms, %.0f ms of %.0f ms import budget used", name, import_times[name] * 1000, total * 1000, IMPORT_BUDGET * 1000)
+
+report_imports("startup")
 
 
 # SETTING PAGE CONFIG TO WIDE MODE
@@ -122,372 +152,169 @@ with st.expander("CITATIONS"):
                     https://www1.nyc.gov/assets/nycha/downloads/pdf/NYCHA-Fact-Sheet_2019_08-01.pdf
                 """)
 
-#Storing/cleaning csv files to cache ################
-@st.cache
-def load_data(filename = "./Datasets/SummerYouth.csv"):
-    df = pd.read_csv(filename)
-    dropCols = ['Average wage of residents','Enrolled in financial counseling services through the program','Enrolled in college-readiness courses or participated in college-readiness activities through the program']
-    df = df.drop(columns=dropCols) # drop the cols from the dataframe
-    df.drop(df.loc[df['NYCHA Development']=='Totals'].index, inplace=True)
-    return df
-
-#storing SNAP and Cash Assistance for NYCHA Residents df
-@st.cache
-def RAWsnap(filename = "./Datasets/SNAPandCASH.csv"):
-    df = pd.read_csv(filename)
-    return df
-#this function uses the raw data snap and cash to get the yearly sum of the number of residents that received benefits under snap and the number that recieved the cash assistance 
-@st.cache
-def sc_data():
-    snapdf = RAWsnap()
-    dropCols = ['Submitted applications for benefits under SNAP','Were income-eligible for SNAP benefits','Submitted applications for benefits under Cash Assistance', 'Were income-eligible for Cash Assisstance']
-    snapdf = snapdf.drop(columns=dropCols) # drop the cols from the dataframe
-    snapdf['Year'] = snapdf['Year'].astype(str)
-    snap = snapdf.groupby(['Year'], as_index=False)['Received benefits under SNAP'].sum()
-    cash = snapdf.groupby(['Year'], as_index=False)['Received benefits under Cash Assistance'].sum()
-    result = pd.merge(snap, cash, on=["Year"])
-    return result
-
-#storing Workforce 1 program for NYCHA Residents df
-@st.cache
-def RAWork(filename = "./Datasets/Workforce_1.csv"):
-    df = pd.read_csv(filename)
-    return df
-
-#this uses the raw data of workforce 1 and groups the enrollment and the residents who benefited from it by the year by taking the sum
-@st.cache(allow_output_mutation=True)
-def work_data():
-    workdf = RAWork()
-    workdf.drop(workdf.loc[workdf['Borough']=='Unknown'].index, inplace=True)
-    dropCols = ['Applied for the program','Average Wage','Enrolled in college-readiness courses or participated in college-readiness activities through the program']
-    workdf = workdf.drop(columns=dropCols)
-    workdf['Placed into full-time or part-time jobs'] = (workdf.iloc[:, 3:8].sum(axis=1))
-    workdf.drop(workdf.iloc[:,3:8] , axis=1, inplace=True)
-    workdf["Were accepted and enrolled"] = workdf['Were accepted and enrolled'].astype(float)
-    workdf["Placed into full-time or part-time jobs"] = workdf['Placed into full-time or part-time jobs'].astype(float)
-    enroll = workdf.groupby(['Year'], as_index=False)['Were accepted and enrolled'].sum()
-    bene = workdf.groupby(['Year'], as_index=False)['Placed into full-time or part-time jobs'].sum()
-    result = pd.merge(enroll, bene, on=["Year"])
-    return result
-
-#storing 2017-18 financial programs dataframe
-@st.cache
-def financial1(filename = "./Datasets/2019Financial_services.csv"):
-    df = pd.read_csv(filename)
-    return df
-
-#storing 2019 financial programs dataframe
-@st.cache
-def financial2(filename = "./Datasets/2017-18_Financial_Services.csv"):
-    df = pd.read_csv(filename)
-    return df
-
-#joining and cleaning the data from the two financial program data frames 
-@st.cache
-def fin():
-    df1 = financial1()
-    df2 = financial2()
-    #df1 = df1.concat(df2)  #join 2019 data with the 2017-18 values dataframe
-    df1 = pd.concat([df1,df2])
-    nan_value = float("NaN")
-    df1.replace("", nan_value, inplace=True) #replace empty values with NaN
-    df1.dropna(how='all', axis=1, inplace=True) #drop columns that contain nothing in them 
-    df1.fillna(0, inplace = True)   #fill NaN values with zero  
-    df1.apply(pd.to_numeric, errors='ignore')
-    return df1
-
-
-def finProgram(stringC):
-    df = fin()
-    new_df = df[df.columns[df.columns.to_series().str.contains(stringC)]] #get all the columns that contain the string (aka the name of the financial program)
-    new_df['Reported_as_Beneficial']= (new_df.iloc[:, 1:-1].sum(axis=1)) + new_df.iloc[: , -1]  #add all the columns where resident reported the program to be helpful
-    new_df.drop(new_df.iloc[:,1:-1] , axis=1, inplace=True) #drop uneeded cols
-    #boro = df1.iloc[:,1] 
-    #dfml.insert(loc=0, column='Borough', value=boro)
-    years = df.iloc[:,0]
-    new_df.insert(loc=0, column='Year', value=years) # insert years to the df 
-    result= new_df.groupby(['Year'], as_index=False).sum() #group by year to get sum by year 
-    return result
-
-
-#Financial empowerment center program analysis
-def program1():
-    df = finProgram(stringC='Empowerment Center Program')
-    df.rename(columns={ df.columns[1]: "Empowerment Center Program" }, inplace = True)
-    return df
-
-def program2():
-    df = finProgram(stringC='CAN!')
-    df.rename(columns={ df.columns[1]: "Residents CAN!" }, inplace = True)
-    return df 
-
-def program3():
-    df = finProgram(stringC='La Ventanilla')
-    df.rename(columns={ df.columns[1]: "La Ventanilla" }, inplace = True)
-    return df
-
-def program4():
-    df = finProgram(stringC='Ready to Rent')
-    df.rename(columns={ df.columns[1]: "Ready to Rent" }, inplace = True)
-    return df
-
-def program5():
-    df = finProgram(stringC='EmpoweredNYC')
-    df.rename(columns={ df.columns[1]: "EmpoweredNYC" }, inplace = True)
-    return df
-
-def program6():
-    df = finProgram(stringC='Student Loan Debt Clinic')
-    df.rename(columns={ df.columns[1]: "Student Loan Debt Clinic" }, inplace = True)
-    return df
-
-#get each financial program from fin() df and get the number of people who used the program 
-def financial_result1():
-    lst = [2017,2018,2019]
-    df1 = program1()
-    col1 = df1.iloc[:, 1]
-    df2 = program2()
-    col2 = df2.iloc[:, 1]
-    df3 = program3()
-    col3 = df3.iloc[:, 1]
-    df4 = program4()
-    col4 = df4.iloc[:, 1]
-    df5 = program5()
-    col5 = df5.iloc[:, 1]
-    df6 = program6()
-    col6 = df6.iloc[:, 1]
-    result = pd.DataFrame(lst, columns =['Year'])
-    result = result.join([col1, col2, col3, col4, col5, col6])
-    return result
-#and how many people benefited from it by year
-def financial_result2():
-    lst = [2017,2018,2019]
-    df1 = program1()
-    df1.rename(columns={ df1.columns[2]: "Empowerment Center Program" }, inplace = True)
-    col1 = df1.iloc[:, 2]
-    df2 = program2()
-    df2.rename(columns={ df2.columns[2]: "Residents CAN!" }, inplace = True)
-    col2 = df2.iloc[:, 2]
-    df3 = program3()
-    df3.rename(columns={ df3.columns[2]: "La Ventanilla" }, inplace = True)
-    col3 = df3.iloc[:, 2]
-    df4 = program4()
-    df4.rename(columns={ df4.columns[2]: "Ready to Rent" }, inplace = True)
-    col4 = df4.iloc[:, 2]
-    df5 = program5()
-    df5.rename(columns={ df5.columns[2]: "EmpoweredNYC" }, inplace = True)
-    col5 = df5.iloc[:, 2]
-    df6 = program6()
-    df6.rename(columns={ df6.columns[2]: "Student Loan Debt Clinic" }, inplace = True)
-    col6 = df6.iloc[:, 2]
-    result = pd.DataFrame(lst, columns =['Year'])
-    result = result.join([col1, col2, col3, col4, col5, col6])
-    return result
-
-
-#storing the analysis from the Summer Youth df by amount applied and accepted per year
-@st.cache
-def year_sum():
-    df = load_data()
-    yearsDF = df.groupby(['Year']).sum()
-    yearsDF['Year'] = [2018, 2019]
-    return yearsDF
-
-scDF = sc_data()
-workDF = work_data()
-finDF = financial_result1()
-finDF1 = financial_result2()
-yearsDF = year_sum()
-raw_summeryouth = load_data()
-
-#visulizations for all the bar graphs using the above dataframes 
-
-st.subheader('Bar Graphs')
-row4_1, row4_2 = st.columns((2,2))
-row1_1, row1_2, row1_3 = st.columns((0.75,2.25,2))
-with row1_1:
-    plist = ["SNAP/Cash Assistance", "Financial Services", "Summer Youth", "WorkForce 1"]
-    service = st.selectbox("Select a Program/Service:", plist)
-
-with row1_2:
-    if service == "SNAP/Cash Assistance":
-        if st.checkbox('Show Analysis on: SNAP and Cash Assistance For NYCHA Residents'):
-            st.write(scDF)
-        fig0 = px.bar(scDF, x="Year", y=["Received benefits under SNAP", "Received benefits under Cash Assistance"], title="NYCHA Residents that reiceved SNAP and/or Cash Assistance ", barmode='group', height=600)
-        st.plotly_chart(fig0)
-        with row1_3:
+#Figures ################
+#the builders and their cache live in figures.py, they import plotly through lazy_import so it counts against the import budget
+figures.import_module = lazy_import
+
+#the figure for chart_id built from this rerun's snapshot, filters (borough=..., development=...) are passed to its builder
+def figure(chart_id, **filters):
+    return figures.cached_figure(chart_id, snap.version, tuple(sorted(filters.items())))
+
+#draw the figure for chart_id, the span covers the cache lookup (or build) and the serialization to the browser
+def plot(chart_id, **filters):
+    with profiling.span("plot", chart=chart_id, **filters):
+        st.plotly_chart(figure(chart_id, **filters))
+
+#Raw data ################
+#a raw table one page at a time, searched and sorted on the server so only the visible rows are sent to the browser
+def raw_viewer(name):
+    columns = data.raw_table(name).columns
+    search_col, sort_col, order_col, page_col = st.columns((2, 2, 1, 1))
+    search = search_col.text_input("Search:", key=f"{name} search").strip() or None
+    sort = sort_col.selectbox("Sort by:", ["File order", *columns], key=f"{name} sort")
+    sort = None if sort == "File order" else sort
+    descending = order_col.checkbox("Descending", key=f"{name} descending", disabled=sort is None)
+    rows = data.raw_rows(name, data.DATA_DIR, sort, descending, search)
+    pages = max(1, -(-len(rows) // data.PAGE_SIZE))
+    page = min(page_col.number_input(f"Page (of {pages}):", min_value=1, max_value=pages, value=1, key=f"{name} page"), pages)
+    st.dataframe(data.raw_page(name, data.DATA_DIR, sort, descending, search, page - 1))
+    first = (page - 1) * data.PAGE_SIZE
+    st.caption(f"Rows {min(first + 1, len(rows))}-{min(first + data.PAGE_SIZE, len(rows))} of {len(rows)}")
+
+#Page sections ################
+#every section reads the unfiltered results from the shared read-only snapshot, filtered charts and tables query data.py
+#the snapshot is taken after the static header above has been sent, so even the first session of a cold process, which
+#builds it and with it every pipeline before the first section, has the header on screen while it waits
+#once built, a rerun only pays for the filtered queries and figures that are not cached yet
+snap = snapshot.current()
+def bar_graphs():
+    st.subheader('Bar Graphs')
+    row4_1, row4_2 = st.columns((2,2))
+    row1_1, row1_2, row1_3 = st.columns((0.75,2.25,2))
+    with row1_1:
+        plist = ["SNAP/Cash Assistance", "Financial Services", "Summer Youth", "WorkForce 1"]
+        service = st.selectbox("Select a Program/Service:", plist)
+        #the filters are pushed down into the sqlite queries behind the charts
+        if service == "Summer Youth":
+            development = st.selectbox("NYCHA Development:", ["All developments", *snap.developments])
+            development = None if development == "All developments" else development
+        else:
+            borough = st.selectbox("Borough:", ["All boroughs", *snap.boroughs])
+            borough = None if borough == "All boroughs" else borough
+
+    with row1_2:
+        if service == "SNAP/Cash Assistance":
+            if st.checkbox('Show Analysis on: SNAP and Cash Assistance For NYCHA Residents'):
+                st.write(figures.results(snap, "sc_data", borough=borough))
+            plot("fig0", borough=borough)
+            with row1_3:
+                with st.expander("Conclusion"):
+                    st.write(figures.CONCLUSIONS["snap"])
+
+        elif service == "Summer Youth":
+            #showing the raw data for Summer Youth 
+            if st.checkbox('Show Raw Data: Summer Youth Employment Program (SYEP) for NYCHA Residents'):
+                raw_viewer("Summer Youth")
+                st.write("Analysis on the raw data")
+                st.write(figures.results(snap, "year_sum", development=development))
+            #visualizing the analysis of the summer youth program by year 
+            plot("fig", development=development)
+            with row1_3:
+                with st.expander("Conclusion"):
+                    st.write(figures.CONCLUSIONS["summer_youth"])
+
+        elif service == "Financial Services":
+            if st.checkbox('Show Raw Data: 2017-19 Financial Services for NYCHA Residents'):
+                for filename in data.financial_files():
+                    st.caption(filename)
+                    raw_viewer(filename)
+            with row1_2:
+                plot("fig1", borough=borough)
+            with row1_3:
+                plot("fig12", borough=borough)
             with st.expander("Conclusion"):
-                st.write("""
-                    For each year, both the SNAP and Cash Assistance programs decline. These two programs are shown to be the 
-                    most commonly used by NYCHA residents. This could mean that there is not enough funding to continue to assist the residents with this service
-                    even when it is in high demand. 
-                """)
+                st.write(figures.CONCLUSIONS["financial"])
+                
+        else:
+            plot("fig01", borough=borough)
+            with row1_3:
+                with st.expander("Conclusion"):
+                    st.write(figures.CONCLUSIONS["workforce"])
+
+def development_analytics():
+    st.subheader('Summer Youth by NYCHA Development')
+    row5_1, row5_2, row5_3, row5_4 = st.columns(4)
+    years = sorted(snap.development_rates["Year"].unique().tolist())
+    year = row5_1.selectbox("Year:", years, index=len(years) - 1)
+    metric = row5_2.selectbox("Rank developments by:", data.DEVELOPMENT_METRICS)
+    n = row5_3.slider("Developments shown:", 5, 50, 10)
+    min_applied = row5_4.number_input("Minimum applicants:", min_value=0, value=10)
+    row6_1, row6_2 = st.columns((2,2))
+    with row6_1:
+        plot("fig05")
+        st.write("Acceptance rate of the developments per year")
+        st.write(snap.acceptance_summary)
+    with row6_2:
+        #both rankings are sorted and cut to n rows inside the indexed sqlite table
+        st.write(f"Top {n} developments by {metric.lower()} in {year}")
+        st.write(data.top_developments(year=year, metric=metric, n=n, min_applied=min_applied))
+        st.write(f"Bottom {n} developments by {metric.lower()} in {year}")
+        st.write(data.top_developments(year=year, metric=metric, n=n, bottom=True, min_applied=min_applied))
+    if year == years[0]:
+        st.info(f"{year} is the first year in the data, there is no previous year to compare the developments with.")
+    else:
+        plot("fig06", year=year, n=n)
+        with st.expander("Change of every development since the previous year"):
+            st.write(figures.results(snap, "development_changes", year=year))
 
-    elif service == "Summer Youth":
-        #showing the raw data for Summer Youth 
-        if st.checkbox('Show Raw Data: Summer Youth Employment Program (SYEP) for NYCHA Residents'):
-            st.write(raw_summeryouth)
-            st.write("Analysis on the raw data")
-            st.write(yearsDF)
-        #visualizing the analysis of the summer youth program by year 
-        fig = px.bar(yearsDF, x="Year", y=["Applied for the program", "Were accepted and enrolled"], title="NYCHA Residents that Applied to Summer Youth Program Vs. were accepted" ,barmode='group', height=600)
-        st.plotly_chart(fig)
-        with row1_3:
-            with st.expander("Conclusion"):
-                st.write("""
-                    The number of residents who applied for the Summer Youth program declined between 2018 and 2019, however, the 
-                    amount that was accepted stayed close to the same. This could mean that there is a limited amount of spots 
-                    available for NYCHA residents. 
-                """)
+def pie_charts():
+    st.subheader('Pie Charts')
+    row3_1, row3_2, row3_3, row3_4 = st.columns((1,2,2,1))
+    with row3_1: 
+        plot("fig03")
+
+    with row3_3: 
+        plot("fig04")
+
+    with st.expander("Conclusion"):
+         st.write(figures.CONCLUSIONS["pie_charts"])
+
+def trend_lines():
+    #scatter plot and linear trend visualizations 
+    row4_1, row4_2 = st.columns((2,2))
+    with row4_1:
+        plot("fig09")
 
-    elif service == "Financial Services":
-        if st.checkbox('Show Raw Data: 2017-19 Financial Services for NYCHA Residents'):
-            rawFin = financial1()
-            st.write(rawFin)
-            rawFin2 = financial2()
-            st.write(rawFin2)
-        with row1_2:
-            fig1 = px.bar(finDF, x="Year", y=["Empowerment Center Program", "Residents CAN!", "La Ventanilla", "Ready to Rent", "EmpoweredNYC", "Student Loan Debt Clinic"], title="NYCHA Residents that enrolled in the Financial Services ", barmode='group', width=600, height=400)
-            st.plotly_chart(fig1)
-        with row1_3:
-            fig12 = px.bar(finDF1, x="Year", y=["Empowerment Center Program", "Residents CAN!", "La Ventanilla", "Ready to Rent", "EmpoweredNYC", "Student Loan Debt Clinic"], 
-                            title="NYCHA Residents that Reported program to be beneficial ", barmode='group', width=600, height=400)
-            st.plotly_chart(fig12)
+    with row4_2:
         with st.expander("Conclusion"):
-            st.write("""
-                This displays all the programs that fall under Financial services.
-                This graph shows that the financial service program with the most enrollment and the most reports about it being beneficial was the 'Empowerment Center Program'. This program 
-                is also increasing throughout the years unlike the other programs listed in Financial services. This means that this 
-                program is in high demand for NYCHA residents and should be given funding in order to keep it going. 
-            """)
-                
-    else:
-        fig01 = px.bar(workDF, x='Year', y=['Were accepted and enrolled', 'Placed into full-time or part-time jobs'], title="NYCHA Residents that enrolled/benefited from Workforce 1 Program ", barmode='group', height=600)
-        st.plotly_chart(fig01)
-        with row1_3:
-            with st.expander("Conclusion"):
-                st.write("""
-                    This shows the significant difference between the number of residents that enroll in the Workforce 1 program and the number who are placed into full-time jobs. 
-                    This demonstrates that while the enrollment rate is not decreasing, there should be greater demand for the program to 
-                    aid residents in finding jobs. 
-                """)
+            st.write(figures.CONCLUSIONS["trend_lines"])
+
+#render a page section and log how long it took and how far into the rerun it finished, the first one is the time to first paint
+def render(name, section):
+    start = time.perf_counter()
+    with profiling.span("section", section=name):
+        section()
+    end = time.perf_counter()
+    log.info("section %s rendered in %.1f ms, %.1f ms into the rerun", name, (end - start) * 1000, (end - RERUN_START) * 1000)
+
+#visulizations for all the bar graphs
+render("bar graphs", bar_graphs)
 ###end of bar graph visulization 
 
 st.markdown("""---""")
 
-#function to get the total amount of enrollment for financial services 
-def combineFin():
-    comb = financial_result1()
-    comb["Total_financial"]= (comb.iloc[:, 1:-1].sum(axis=1)) + comb.iloc[: , -1]  #add all the columns for the financial services 
-    comb.loc[len(comb.index)] = ['2020', None, None, None, None,None, None, None]
-    return comb
-
-comb = combineFin()
-
-#creaing the pie charts data from the mean of enrollments for each service 
-@st.cache
-def pie_data():  #this function takes the mean number of all the resisdents for each program/service and stores it into a series
-    df = finDF[["Empowerment Center Program", "Residents CAN!", "La Ventanilla", "Ready to Rent", "EmpoweredNYC", "Student Loan Debt Clinic"]]
-    dfmean = df.mean().mean()
-    values = [dfmean]
-    col_mean = scDF["Received benefits under SNAP"].mean()
-    values.append(col_mean)
-    col_mean = scDF["Received benefits under Cash Assistance"].mean()
-    values.append(col_mean)
-    col_mean = workDF["Were accepted and enrolled"].mean()
-    values.append(col_mean)
-    col_mean = yearsDF["Were accepted and enrolled"].mean()
-    values.append(col_mean)
-    values = [round(num, 4) for num in values]
-    return values
-
-#doing the same as the function above put for all the services that fall under the financial services 
-@st.cache
-def pie_data1():  #this function takes the mean number of all the resisdents for each program/service and stores it into a series
-    col_mean = finDF[["Empowerment Center Program", "Residents CAN!", "La Ventanilla", "Ready to Rent", "EmpoweredNYC", "Student Loan Debt Clinic"]].mean()
-    values = [col_mean.iloc[0], col_mean.iloc[1], col_mean.iloc[2], col_mean.iloc[3],col_mean.iloc[4],col_mean.iloc[5]]
-    values = [round(num, 4) for num in values]
-    return values
+#acceptance rates, rankings and year-over-year changes of the individual developments
+render("development analytics", development_analytics)
+
+st.markdown("""---""")
 
 #visuliazing the pie charts 
-st.subheader('Pie Charts')
-row3_1, row3_2, row3_3, row3_4 = st.columns((1,2,2,1))
-with row3_1: 
-    v = pie_data()
-    labels = ["Financial Services", "SNAP", "Cash Assistance", "Workforce 1", "Summer Youth"]
-    fig03 = go.Figure(data=[go.Pie(labels=labels, values=v)])
-    fig03.update_layout(title="Percentage of Enrollment per Service/Program")
-    st.plotly_chart(fig03)
-
-with row3_3: 
-    v1 = pie_data1()
-    labels1 = ["Empowerment Center Program", "Residents CAN!", "La Ventanilla", "Ready to Rent", "EmpoweredNYC", "Student Loan Debt Clinic"] 
-    fig04 = go.Figure(data=[go.Pie(labels=labels1, values=v1, marker_colors=["#FF97FF", "#FECB52", "#B6E880", "#FF6692", "#19D3F3", "#FFA15A"])])
-    fig04.update_layout(title="Percentage of Enrollment by Financial Services",uniformtext_minsize=12, uniformtext_mode='hide')
-    st.plotly_chart(fig04)
-
-with st.expander("Conclusion"):
-     st.write("""
-         These charts show the percentage of enrollment for each Service/program. On the first chart, 'SNAP', 'Cash Assistance' and
-         'Workforce 1' has the highest enrollment rates. 'Financial Services' is of very low percentage so I broke down the services that fall 
-         under it on the hart to the right. Here we can tell that the financial services with the most enrollment are 'Empowerment Center Program', 'Residents CAN!', and 'Ready to Rent'. 
-         This tells us that these services are in high demand, on top of that these services were also reported as most beneficial to the residents. Therefore funding should go to these 
-         programs (or programs similar to this) for NYCHA residents. 
-
-     """)
+render("pie charts", pie_charts)
 
 st.markdown("""---""")
 
 st.subheader('Scatter Plot and Linear Trend Lines')
-
-#getting Linear regression line
-X = scDF["Year"]
-Y = scDF["Received benefits under Cash Assistance"]
-X= X.values.reshape(-1,1)
-Y= Y.values.reshape(-1,1)
-linear_regressor = LinearRegression()  # create object for the class
-linear_regressor.fit(X, Y)  # perform linear regression
-Y_pred = linear_regressor.predict(X)  # make predictions
-
-
-def legend_name(names):
-    for i, new in enumerate(names):
-        fig09.data[i].name = new
-
-SummerYouth_enrollment = [None, 10329.0, 10643.0, None]
-SummerYouthdf = pd.DataFrame(SummerYouth_enrollment, columns=['SummerYouth_enrollment'])
-Workforce1_enrollment = [14319.0, 13007.0, 14268.0, None]
-
-
-#scatter plot and linear trend visualizations 
-row4_1, row4_2 = st.columns((2,2))
-with row4_1:
-    listyear = ["2017","2018","2019","2020"]
-    fig09 = px.scatter(
-        x=listyear,
-        y=[scDF["Received benefits under Cash Assistance"].astype(float), scDF["Received benefits under SNAP"].astype(float), SummerYouthdf["SummerYouth_enrollment"], comb["Total_financial"].astype(float), Workforce1_enrollment],
-        trendline="ols"
-    )
-    legend_name(["Cash Assistance", None, "SNAP", None, "Summer Youth", None, "Financial Services", None, "Workforce 1"])
-    fig09.update_layout(
-    title="Regression line For Each Service/Program",
-    xaxis_title="Year",
-    yaxis_title="Enrollment",
-    legend_title="Service/Program")
-    fig09.update_traces(marker_size=10)
-    st.plotly_chart(fig09)
-
-with row4_2:
-    with st.expander("Conclusion"):
-        st.write("""
-            By grouping the enrollment for each service by year we can see that most of the Services
-            and Programs have been declining yearly. The linear trends for each service/program also showcase this.
-            SNAP and Cash Assistance programs have the highest enrollment, while Summer Youth, Financial Services, and Workforce 1 do 
-            not have data to show for past 2019. However, those 3 services were the only ones to have an enrollment increase between a year 
-            or two. Financial services and Workforce 1 have a significant decrease in enrollment in  2018. This could mean that the services 
-            were not as available to residents due to budget cutbacks. In 2019, you see the enrollments spike up again, showing that 
-            these services are useful to the residents.
-        """)
+render("trend lines", trend_lines)
 
 st.markdown("""---""")
 
@@ -495,3 +322,35 @@ st.markdown("""---""")
 col1, col2, col3, col4, col5 = st.columns(5)
 if col3.button("Thank you for taking the time to view my project!😊✨"):
     st.balloons()
+
+#Debug panel ################
+#?debug=1 in the url adds a sidebar with the timing breakdown of this rerun and the hit rates of every memoized function
+SPAN_LABELS = ["section", "chart", "stage", "frame", "table"]  #the attribute that tells spans of the same name apart
+
+def debug_panel(trace):
+    go = lazy_import("plotly.graph_objects")
+    spans = sorted(trace.spans, key=lambda record: record["offset_ms"])
+    depth = {}
+    rows = []
+    for record in spans:
+        depth[record["span_id"]] = depth.get(record["parent_id"], -1) + 1
+        attributes = record["attributes"]
+        label = next((f"{record['name']} {attributes[key]}" for key in SPAN_LABELS if key in attributes), record["name"])
+        rows.append({"span": ". " * depth[record["span_id"]] + label, "name": record["name"], "start ms": record["offset_ms"],
+                     "ms": record["duration_ms"], "cache": attributes.get("cache")})
+    df = pd.DataFrame(rows, columns=["span", "name", "start ms", "ms", "cache"])
+    with st.sidebar:
+        st.subheader("Rerun profile")
+        st.write(f"{trace.elapsed() * 1000:.0f} ms so far, {len(df)} spans")
+        shown = df[df["ms"] >= 0.5]  #cache hits take microseconds and would only crowd the chart
+        fig = go.Figure(go.Bar(y=shown["span"], x=shown["ms"], base=shown["start ms"], orientation="h"))
+        fig.update_layout(height=120 + 18 * len(shown), margin=dict(l=0, r=0, t=20, b=0), xaxis_title="ms into the rerun", yaxis_autorange="reversed")
+        st.plotly_chart(fig, use_container_width=True)
+        st.write("Time by span name")
+        st.dataframe(df.groupby("name").agg(calls=("ms", "size"), total_ms=("ms", "sum"), hits=("cache", lambda cache: (cache == "hit").sum())).sort_values("total_ms", ascending=False))
+        st.write("Cache hit rates")
+        stats = pd.DataFrame(memo.stats()).T
+        st.dataframe(stats[["hits", "misses", "hit_rate", "entries", "compute_time"]].sort_values("compute_time", ascending=False))
+
+if st.query_params.get("debug") == "1":
+    debug_panel(TRACE)
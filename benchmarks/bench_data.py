@@ -0,0 +1,101 @@
+import concurrent.futures
+import shutil
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import data
+import figures
+import memo
+import preprocess
+import snapshot
+
+#run with: python -m pytest benchmarks/bench_data.py [--scales 1,10] [--benchmark-autosave]
+#each derivation is timed from a cold memo cache with the on-disk frame cache already built, which is what a fresh
+#worker sees after the first deploy, the peak python memory of one run is stored in extra_info
+DERIVATIONS = [
+    "load_data",
+    "sc_data",
+    "work_data",
+    "financial_results",
+    "year_sum",
+    "combineFin",
+    "pie_data",
+    "pie_data1",
+    "trend_fits",
+    "development_rates",
+    "acceptance_summary",
+    "top_developments",
+    "development_changes",
+]
+
+
+def peak_memory(func, *args):
+    memo.clear()
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("name", DERIVATIONS)
+def test_derivation(benchmark, dataset, name):
+    func = getattr(data, name)
+    func(dataset)  #builds the feather cache for this copy
+    benchmark.extra_info["peak_mb"] = peak_memory(func, dataset) / 2**20
+    benchmark.pedantic(func, args=(dataset,), setup=memo.clear, rounds=5, warmup_rounds=1)
+
+
+#csv parsing and cleaning, the cost of a cold start with no cache or of a changed csv
+def test_ingest(benchmark, dataset):
+    def rebuild():
+        shutil.rmtree(os.path.join(dataset, preprocess.CACHE_DIR), ignore_errors=True)
+        memo.clear()
+        data.pie_data(dataset)
+        data.trend_fits(dataset)
+        for path in preprocess.sources("financial", dataset):
+            preprocess.raw(path)
+        data.load_data(dataset)
+
+    benchmark.extra_info["peak_mb"] = peak_memory(rebuild) / 2**20
+    benchmark.pedantic(rebuild, rounds=3)
+
+
+#one page of the Summer Youth raw table searched and sorted on the server, the cost of a raw data viewer interaction
+def test_raw_page(benchmark, dataset):
+    data.raw_table("Summer Youth", dataset)
+    page = benchmark.pedantic(data.raw_page, args=("Summer Youth", dataset, "Applied for the program", True, "houses"), setup=memo.clear, rounds=5, warmup_rounds=1)
+    assert len(page) <= data.PAGE_SIZE
+
+
+#the data side of a rerun with users sessions rerunning at once: every session takes the shared snapshot, queries the
+#filters it picked (one of a handful of boroughs and developments, so most reruns hit the memo while a few compute)
+#and looks up its figures, the p95 latency of one rerun, stored in extra_info, should not grow with the number of users
+@pytest.mark.parametrize("users", [1, 8, 32])
+def test_concurrent_reruns(benchmark, dataset, users):
+    snap = snapshot.current(dataset)
+    boroughs, developments = snap.boroughs, snap.developments[:20]
+    latencies = []
+
+    def rerun(i):
+        start = time.perf_counter()
+        snap = snapshot.current(dataset)
+        borough, development = boroughs[i % len(boroughs)], developments[i % len(developments)]
+        figures.results(snap, "sc_data", borough=borough)
+        figures.results(snap, "year_sum", development=development)
+        data.top_developments(dataset, n=10)
+        for chart_id, filters in [("fig0", (("borough", borough),)), ("fig", (("development", development),)), ("fig03", ()), ("fig09", ())]:
+            figures.cached_figure(chart_id, snap.version, filters, dataset)
+        latencies.append(time.perf_counter() - start)
+
+    def serve():
+        with concurrent.futures.ThreadPoolExecutor(users) as pool:
+            list(pool.map(rerun, range(users * 10)))
+
+    benchmark.pedantic(serve, rounds=3)
+    benchmark.extra_info["p95_ms"] = np.percentile(latencies, 95) * 1000
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import preprocess  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption("--scales", default="1,10,100,1000", help="comma separated row multipliers of the bundled datasets")
+
+
+def pytest_generate_tests(metafunc):
+    if "dataset" in metafunc.fixturenames:
+        scales = [int(scale) for scale in metafunc.config.getoption("scales").split(",")]
+        metafunc.parametrize("dataset", scales, indirect=True, ids=[f"x{scale}" for scale in scales])
+
+
+#copy of Datasets/ with every csv repeated scale times, Summer Youth developments get a suffix per copy so the
+#number of developments grows with the file like it does in the multi-year extracts
+def write_scaled(source_dir, target_dir, scale):
+    os.makedirs(target_dir, exist_ok=True)
+    for filename in os.listdir(source_dir):
+        if not filename.endswith(".csv"):
+            continue
+        df = pd.read_csv(os.path.join(source_dir, filename), dtype=str, keep_default_na=False)
+        copies = []
+        for i in range(scale):
+            copy = df.copy()
+            if i and "NYCHA Development" in copy:
+                developments = copy["NYCHA Development"]
+                copy["NYCHA Development"] = developments.where(developments == "Totals", developments + f" ({i})")
+            copies.append(copy)
+        pd.concat(copies).to_csv(os.path.join(target_dir, filename), index=False)
+    return target_dir
+
+
+@pytest.fixture(scope="session")
+def dataset(request, tmp_path_factory):
+    scale = request.param
+    return write_scaled(os.path.join(ROOT, preprocess.DATA_DIR), str(tmp_path_factory.mktemp(f"x{scale}")), scale)
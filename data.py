@@ -0,0 +1,267 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import preprocess
+import store
+import memo
+import trend
+from memo import memoize
+
+#the loaders and derivations behind app1.py, importable without streamlit so they can be benchmarked and reused
+#every function takes the directory holding the csv files, the dashboard always uses DATA_DIR
+DATA_DIR = preprocess.DATA_DIR
+
+_versions = {}  #data_dir -> data version the memoized results were computed from
+
+#forget every memoized result once the csv files in data_dir change, so a new extract shows on the next rerun
+def refresh(data_dir = DATA_DIR):
+    version = preprocess.data_version(data_dir)
+    if _versions.setdefault(data_dir, version) != version:
+        memo.clear()
+        _versions[data_dir] = version
+    return version
+
+#Storing/cleaning csv files to cache ################
+#the cleaning itself lives in preprocess.py, which keeps the cleaned frames on disk until their csv changes
+#every csv of a dataset contributes its own cached frame, so a new year's extract only adds one more frame to read
+@memoize
+def load_data(data_dir = DATA_DIR):
+    return pd.concat([preprocess.summer_youth(f) for f in preprocess.sources("summer_youth", data_dir)], ignore_index=True)
+
+#yearly sum of the number of residents that received benefits under snap and the number that recieved the cash assistance, optionally for one borough
+@memoize
+def sc_data(data_dir = DATA_DIR, borough = None):
+    filters, params = store.where({"Borough": borough})
+    return store.query(f'''
+        SELECT CAST(Year AS TEXT) AS Year,
+               COALESCE(SUM("Received benefits under SNAP"), 0) AS "Received benefits under SNAP",
+               COALESCE(SUM("Received benefits under Cash Assistance"), 0) AS "Received benefits under Cash Assistance"
+        FROM snap WHERE 1 = 1{filters}
+        GROUP BY Year ORDER BY Year''', params, data_dir)
+
+#groups the enrollment of workforce 1 and the residents who benefited from it by the year by taking the sum, optionally for one borough
+@memoize
+def work_data(data_dir = DATA_DIR, borough = None):
+    filters, params = store.where({"Borough": borough})
+    return store.query(f'''
+        SELECT Year,
+               COALESCE(SUM("Were accepted and enrolled"), 0) AS "Were accepted and enrolled",
+               COALESCE(SUM("Placed into full-time or part-time jobs"), 0) AS "Placed into full-time or part-time jobs"
+        FROM workforce WHERE 1 = 1{filters}
+        GROUP BY Year ORDER BY Year''', params, data_dir)
+
+#Raw data viewer ################
+#the raw tables are searched, sorted and sliced here so the dashboard only sends one page of rows to the browser
+PAGE_SIZE = 50
+
+#a raw table by name: "Summer Youth" or the file name of one of the financial services csv files
+@memoize
+def raw_table(name, data_dir = DATA_DIR):
+    if name == "Summer Youth":
+        return load_data(data_dir)
+    if preprocess.dataset_of(name) != "financial":
+        raise ValueError(f"unknown raw table {name!r}")
+    return preprocess.raw(os.path.join(data_dir, name))
+
+#file names of the financial services csv files, each one is its own raw table
+def financial_files(data_dir = DATA_DIR):
+    return [os.path.basename(path) for path in preprocess.sources("financial", data_dir)]
+
+#positions of the rows of a raw table that contain search (any text column, case-insensitive) in sort order
+@memoize(max_entries=64)
+def raw_rows(name, data_dir = DATA_DIR, sort = None, descending = False, search = None):
+    df = raw_table(name, data_dir)
+    rows = np.arange(len(df))
+    if search:
+        found = np.zeros(len(df), dtype=bool)
+        for col in df.columns:
+            if df[col].dtype == "category":  #match the categories once instead of every row
+                matches = df[col].cat.categories.astype(str).str.contains(search, case=False, regex=False)
+                found |= np.isin(df[col].cat.codes.to_numpy(), np.flatnonzero(matches))
+            elif df[col].dtype == object:
+                found |= df[col].astype(str).str.contains(search, case=False, regex=False).to_numpy()
+        rows = rows[found]
+    if sort is not None:
+        order = df[sort].iloc[rows].reset_index(drop=True).sort_values(ascending=not descending, kind="stable").index.to_numpy()
+        rows = rows[order]
+    rows.flags.writeable = False
+    return rows
+
+#rows page * page_size up to (page + 1) * page_size of a searched and sorted raw table
+def raw_page(name, data_dir = DATA_DIR, sort = None, descending = False, search = None, page = 0, page_size = PAGE_SIZE):
+    rows = raw_rows(name, data_dir, sort, descending, search)
+    return raw_table(name, data_dir).iloc[rows[page * page_size:(page + 1) * page_size]]
+
+#one query sums every program by year into enrolled and reported-as-beneficial (all other metrics), the two tables are pivoted from it
+@memoize
+def financial_results(data_dir = DATA_DIR, borough = None):
+    filters, params = store.where({"Borough": borough})
+    sums = store.query(f'''
+        SELECT Year, CASE WHEN metric = 'enrolled' THEN 'enrolled' ELSE 'beneficial' END AS metric, program, COALESCE(SUM(value), 0) AS value
+        FROM financial WHERE 1 = 1{filters}
+        GROUP BY 1, 2, 3''', params, data_dir)
+    yearly = sums.pivot_table(index="Year", columns=["metric", "program"], values="value", aggfunc="sum").astype(float)
+    yearly = yearly.reindex(columns=pd.MultiIndex.from_product([["enrolled", "beneficial"], list(preprocess.FIN_PROGRAMS)]), fill_value=0.0).fillna(0.0)
+    enrolled = yearly["enrolled"].reset_index()
+    beneficial = yearly["beneficial"].reset_index()
+    enrolled.columns.name = beneficial.columns.name = None
+    return enrolled, beneficial
+
+#get the number of people who used each financial program by year
+@memoize
+def financial_result1(data_dir = DATA_DIR, borough = None):
+    return financial_results(data_dir, borough)[0]
+
+#and how many people benefited from it by year
+@memoize
+def financial_result2(data_dir = DATA_DIR, borough = None):
+    return financial_results(data_dir, borough)[1]
+
+
+#storing the analysis from the Summer Youth df by amount applied and accepted per year, optionally for one development
+@memoize(max_entries=128)
+def year_sum(data_dir = DATA_DIR, development = None):
+    filters, params = store.where({"NYCHA Development": development})
+    yearsDF = store.query(f'''
+        SELECT Year,
+               COALESCE(SUM("Applied for the program"), 0) AS "Applied for the program",
+               COALESCE(SUM("Were accepted and enrolled"), 0) AS "Were accepted and enrolled"
+        FROM summer_youth WHERE 1 = 1{filters}
+        GROUP BY Year ORDER BY Year''', params, data_dir)
+    return yearsDF.set_index("Year", drop=False)
+
+#Development-level Summer Youth ################
+#all of these read the summer_youth table, which is already summed per year and development and indexed on both
+#rows without a development only count towards the yearly totals of year_sum, they are not ranked or compared here
+DEVELOPMENT_METRICS = ["Acceptance rate", "Applied for the program", "Were accepted and enrolled"]
+
+#applied, accepted and acceptance rate (accepted / applied, NaN without applicants) of every development and year
+@memoize
+def development_rates(data_dir = DATA_DIR):
+    return store.query('''
+        SELECT Year, "NYCHA Development",
+               SUM("Applied for the program") AS "Applied for the program",
+               SUM("Were accepted and enrolled") AS "Were accepted and enrolled",
+               CAST(SUM("Were accepted and enrolled") AS REAL) / NULLIF(SUM("Applied for the program"), 0) AS "Acceptance rate"
+        FROM summer_youth WHERE "NYCHA Development" IS NOT NULL
+        GROUP BY Year, "NYCHA Development" ORDER BY Year, "NYCHA Development"''', (), data_dir)
+
+#count, mean, spread and quantiles of the acceptance rates of the developments in each year
+@memoize
+def acceptance_summary(data_dir = DATA_DIR):
+    return development_rates(data_dir).groupby("Year")["Acceptance rate"].describe(percentiles=[0.1, 0.25, 0.5, 0.75, 0.9])
+
+#the n developments with the highest (bottom=True: lowest) metric in year, the latest year when year is None
+#developments with fewer than min_applied applicants are left out, so 1 of 1 accepted does not top the rate ranking
+#HAVING filters on the aggregates themselves, a bare column there would be one row of the group and not its sum
+@memoize(max_entries=128)
+def top_developments(data_dir = DATA_DIR, year = None, metric = "Acceptance rate", n = 10, bottom = False, min_applied = 10):
+    if metric not in DEVELOPMENT_METRICS:
+        raise ValueError(f"unknown metric {metric!r}, expected one of {DEVELOPMENT_METRICS}")
+    aggregates = {
+        "Applied for the program": 'SUM("Applied for the program")',
+        "Were accepted and enrolled": 'SUM("Were accepted and enrolled")',
+        "Acceptance rate": 'CAST(SUM("Were accepted and enrolled") AS REAL) / NULLIF(SUM("Applied for the program"), 0)',
+    }
+    return store.query(f'''
+        SELECT Year, "NYCHA Development",
+               {aggregates["Applied for the program"]} AS "Applied for the program",
+               {aggregates["Were accepted and enrolled"]} AS "Were accepted and enrolled",
+               {aggregates["Acceptance rate"]} AS "Acceptance rate"
+        FROM summer_youth
+        WHERE Year = COALESCE(?, (SELECT MAX(Year) FROM summer_youth)) AND "NYCHA Development" IS NOT NULL
+        GROUP BY Year, "NYCHA Development"
+        HAVING {aggregates["Applied for the program"]} >= ? AND {aggregates[metric]} IS NOT NULL
+        ORDER BY "{metric}" {"ASC" if bottom else "DESC"}, "NYCHA Development"
+        LIMIT ?''', (year, min_applied, n), data_dir).astype({"Acceptance rate": float})
+
+#change in applied, accepted and acceptance rate of every development since the previous year in the data, optionally for one year
+#the yearly sums are joined to themselves on (development, previous year), a development missing from either year has no row
+@memoize
+def development_changes(data_dir = DATA_DIR, year = None):
+    changes = store.query('''
+        WITH yearly AS (
+            SELECT Year, "NYCHA Development" AS development,
+                   SUM("Applied for the program") AS applied, SUM("Were accepted and enrolled") AS accepted
+            FROM summer_youth WHERE "NYCHA Development" IS NOT NULL GROUP BY Year, "NYCHA Development"),
+        years AS (
+            SELECT Year, LAG(Year) OVER (ORDER BY Year) AS previous FROM (SELECT DISTINCT Year FROM summer_youth))
+        SELECT cur.Year, years.previous AS "Previous year", cur.development AS "NYCHA Development",
+               cur.applied AS "Applied for the program", cur.applied - prev.applied AS "Applied change",
+               cur.accepted AS "Were accepted and enrolled", cur.accepted - prev.accepted AS "Accepted change",
+               CAST(cur.accepted AS REAL) / NULLIF(cur.applied, 0) - CAST(prev.accepted AS REAL) / NULLIF(prev.applied, 0) AS "Acceptance rate change"
+        FROM yearly AS cur
+        JOIN years ON years.Year = cur.Year
+        JOIN yearly AS prev ON prev.Year = years.previous AND prev.development = cur.development
+        WHERE ? IS NULL OR cur.Year = ?
+        ORDER BY cur.Year, cur.development''', (year, year), data_dir)
+    counts = ["Year", "Previous year", "Applied for the program", "Applied change", "Were accepted and enrolled", "Accepted change"]
+    return changes.astype({**dict.fromkeys(counts, "Int64"), "Acceptance rate change": float})  #stable dtypes even when no row matched
+
+#the values the borough and development filters can take, rows without one still count in the unfiltered totals
+@memoize
+def boroughs(data_dir = DATA_DIR):
+    return store.query('''
+        SELECT Borough FROM snap WHERE Borough IS NOT NULL
+        UNION SELECT Borough FROM workforce WHERE Borough IS NOT NULL
+        UNION SELECT Borough FROM financial WHERE Borough IS NOT NULL
+        ORDER BY Borough''', (), data_dir)["Borough"].tolist()
+
+@memoize
+def developments(data_dir = DATA_DIR):
+    return store.query('''SELECT DISTINCT "NYCHA Development" FROM summer_youth WHERE "NYCHA Development" IS NOT NULL ORDER BY 1''', (), data_dir)["NYCHA Development"].tolist()
+
+#function to get the total amount of enrollment for financial services 
+@memoize
+def combineFin(data_dir = DATA_DIR):
+    comb = financial_result1(data_dir).copy()
+    comb["Total_financial"]= (comb.iloc[:, 1:-1].sum(axis=1)) + comb.iloc[: , -1]  #add all the columns for the financial services 
+    return comb
+
+#creaing the pie charts data from the mean of enrollments for each service 
+@memoize
+def pie_data(data_dir = DATA_DIR):  #this function takes the mean number of all the resisdents for each program/service and stores it into a series
+    df = financial_result1(data_dir)[["Empowerment Center Program", "Residents CAN!", "La Ventanilla", "Ready to Rent", "EmpoweredNYC", "Student Loan Debt Clinic"]]
+    dfmean = df.mean().mean()
+    values = [dfmean]
+    scDF = sc_data(data_dir)
+    col_mean = scDF["Received benefits under SNAP"].mean()
+    values.append(col_mean)
+    col_mean = scDF["Received benefits under Cash Assistance"].mean()
+    values.append(col_mean)
+    col_mean = work_data(data_dir)["Were accepted and enrolled"].mean()
+    values.append(col_mean)
+    col_mean = year_sum(data_dir)["Were accepted and enrolled"].mean()
+    values.append(col_mean)
+    values = [round(num, 4) for num in values]
+    return values
+
+#doing the same as the function above put for all the services that fall under the financial services 
+@memoize
+def pie_data1(data_dir = DATA_DIR):  #this function takes the mean number of all the resisdents for each program/service and stores it into a series
+    col_mean = financial_result1(data_dir)[["Empowerment Center Program", "Residents CAN!", "La Ventanilla", "Ready to Rent", "EmpoweredNYC", "Student Loan Debt Clinic"]].mean()
+    values = [col_mean.iloc[0], col_mean.iloc[1], col_mean.iloc[2], col_mean.iloc[3],col_mean.iloc[4],col_mean.iloc[5]]
+    values = [round(num, 4) for num in values]
+    return values
+
+#yearly enrollment of every service on one year axis, the input of the trend lines
+#the axis is the union of the years found in the data, a service without a value for a year gets NaN there
+@memoize
+def trend_series(data_dir = DATA_DIR):
+    scDF = sc_data(data_dir).astype({"Year": int}).set_index("Year")
+    df = pd.DataFrame({
+        "Cash Assistance": scDF["Received benefits under Cash Assistance"],
+        "SNAP": scDF["Received benefits under SNAP"],
+        "Summer Youth": year_sum(data_dir)["Were accepted and enrolled"],
+        "Financial Services": combineFin(data_dir).set_index("Year")["Total_financial"],
+        "Workforce 1": work_data(data_dir).set_index("Year")["Were accepted and enrolled"],
+    }, dtype=float).sort_index()
+    df.index = df.index.astype(int).rename("Year")
+    return df
+
+#slope, intercept and R² of the linear trend of every service
+@memoize
+def trend_fits(data_dir = DATA_DIR):
+    return trend.fit(trend_series(data_dir))
@@ -0,0 +1,114 @@
+import argparse
+import html
+import json
+import os
+import shutil
+
+import figures
+import snapshot
+from data import DATA_DIR
+
+#python export.py [--out site] prerenders the dashboard into a static bundle that any file server or CDN can serve:
+#  index.html             every chart, summary table and conclusion on one page, plotly.js inlined once
+#  figures/<chart>.json   the plotly figure of each chart id, for embedding elsewhere with Plotly.newPlot
+#  tables/<name>.json     the summary tables as records
+#  conclusions.json       the conclusion text of every section
+#  manifest.json          the data version the bundle was built from, an unchanged Datasets/ is not exported again
+OUT_DIR = "site"
+
+#page layout: (heading, chart ids, summary tables, conclusion or None)
+SECTIONS = [
+    ("SNAP and Cash Assistance", ["fig0"], ["sc_data"], "snap"),
+    ("Summer Youth", ["fig"], ["year_sum"], "summer_youth"),
+    ("Summer Youth by NYCHA Development", ["fig05", "fig06"], ["acceptance_summary"], None),
+    ("Financial Services", ["fig1", "fig12"], ["financial_result1", "financial_result2", "combineFin"], "financial"),
+    ("Workforce 1", ["fig01"], ["work_data"], "workforce"),
+    ("Pie Charts", ["fig03", "fig04"], [], "pie_charts"),
+    ("Scatter Plot and Linear Trend Lines", ["fig09"], ["trend_fits"], "trend_lines"),
+]
+TABLES = ["sc_data", "work_data", "financial_result1", "financial_result2", "year_sum", "combineFin", "trend_fits",
+          "acceptance_summary", "development_changes"]
+INDEXED = ["trend_fits", "acceptance_summary"]  #tables whose index is part of the data
+
+
+def _manifest_version(out_dir):
+    try:
+        with open(os.path.join(out_dir, "manifest.json")) as f:
+            return json.load(f)["data_version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+#a conclusion as one line of text, the line breaks in figures.py only keep the source readable
+def _paragraph(text):
+    return " ".join(text.split())
+
+
+def _page(snap, rendered):
+    parts = []
+    plotlyjs = True  #inline plotly.js with the first chart only, the page then needs no network access
+    for heading, chart_ids, tables, conclusion in SECTIONS:
+        parts.append(f"<h2>{html.escape(heading)}</h2>")
+        for chart_id in chart_ids:
+            parts.append(rendered[chart_id].to_html(full_html=False, include_plotlyjs=plotlyjs, div_id=chart_id))
+            plotlyjs = False
+        for name in tables:
+            parts.append(getattr(snap, name).to_html(index=name in INDEXED, border=0, classes="summary", float_format="{:,.4g}".format))
+        if conclusion is not None:
+            parts.append(f"<p>{html.escape(_paragraph(figures.CONCLUSIONS[conclusion]))}</p>")
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>NYCHA Data Science</title>
+<style>body {{font-family: sans-serif; margin: 2em;}} table.summary {{border-collapse: collapse; margin: 1em 0;}} table.summary td, table.summary th {{padding: 0.2em 0.6em; text-align: right;}}</style>
+</head>
+<body>
+<h1>Decline of Services/Programs for NYCHA Residents</h1>
+<p>Data version {snap.version}</p>
+{chr(10).join(parts)}
+</body>
+</html>
+"""
+
+
+#write the bundle for data_dir into out_dir and return the path, or None when it is already up to date
+#the bundle is written next to out_dir and renamed into place at the end, a file server never sees a half-written one
+def export(out_dir=OUT_DIR, data_dir=DATA_DIR, force=False):
+    snap = snapshot.current(data_dir)
+    if not force and _manifest_version(out_dir) == snap.version:
+        return None
+    tmp_dir = f"{out_dir.rstrip(os.sep)}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    rendered = {chart_id: build(snap) for chart_id, build in figures.FIGURES.items()}
+    for chart_id, fig in rendered.items():
+        _write(os.path.join(tmp_dir, "figures", f"{chart_id}.json"), fig.to_json())
+    for name in TABLES:
+        table = getattr(snap, name)
+        _write(os.path.join(tmp_dir, "tables", f"{name}.json"), (table.reset_index() if name in INDEXED else table).to_json(orient="records"))
+    _write(os.path.join(tmp_dir, "index.html"), _page(snap, rendered))
+    conclusions = {name: _paragraph(text) for name, text in figures.CONCLUSIONS.items()}
+    _write(os.path.join(tmp_dir, "conclusions.json"), json.dumps(conclusions, indent=1))
+    _write(os.path.join(tmp_dir, "manifest.json"), json.dumps({"data_version": snap.version, "figures": sorted(rendered), "tables": TABLES}, indent=1))
+    old_dir = f"{out_dir.rstrip(os.sep)}.{os.getpid()}.old"
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="prerender the dashboard into a static HTML/JSON bundle")
+    parser.add_argument("--out", default=OUT_DIR, help="directory of the bundle (default: %(default)s)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory of the csv files (default: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="export even if the bundle was built from the same data")
+    args = parser.parse_args()
+    path = export(args.out, args.data_dir, args.force)
+    print(f"exported to {path}" if path else f"{args.out} is up to date")
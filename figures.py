@@ -0,0 +1,159 @@
+import importlib
+
+import pandas as pd
+
+import data
+import snapshot
+import trend
+from memo import memoize
+
+#the charts and conclusions of the dashboard, importable without streamlit so export.py can prerender them
+#every builder takes the analytics snapshot of one data version, filtered charts query data.py for their rows
+FIN_COLUMNS = ["Empowerment Center Program", "Residents CAN!", "La Ventanilla", "Ready to Rent", "EmpoweredNYC", "Student Loan Debt Clinic"]
+
+#how the builders import plotly, app1.py swaps in its lazy_import so the time counts against its import budget
+import_module = importlib.import_module
+
+
+#a result of data.py, unfiltered from the snapshot and filtered from the memoized queries
+def results(snap, name, **filters):
+    if all(value is None for value in filters.values()):
+        return getattr(snap, name)
+    return getattr(data, name)(snap.data_dir, **filters)
+
+def bar_snap(snap, borough=None):
+    px = import_module("plotly.express")
+    return px.bar(results(snap, "sc_data", borough=borough), x="Year", y=["Received benefits under SNAP", "Received benefits under Cash Assistance"], title="NYCHA Residents that reiceved SNAP and/or Cash Assistance ", barmode='group', height=600)
+
+def bar_summer_youth(snap, development=None):
+    px = import_module("plotly.express")
+    return px.bar(results(snap, "year_sum", development=development), x="Year", y=["Applied for the program", "Were accepted and enrolled"], title="NYCHA Residents that Applied to Summer Youth Program Vs. were accepted" ,barmode='group', height=600)
+
+def bar_financial_enrolled(snap, borough=None):
+    px = import_module("plotly.express")
+    return px.bar(results(snap, "financial_result1", borough=borough), x="Year", y=FIN_COLUMNS, title="NYCHA Residents that enrolled in the Financial Services ", barmode='group', width=600, height=400)
+
+def bar_financial_beneficial(snap, borough=None):
+    px = import_module("plotly.express")
+    return px.bar(results(snap, "financial_result2", borough=borough), x="Year", y=FIN_COLUMNS, title="NYCHA Residents that Reported program to be beneficial ", barmode='group', width=600, height=400)
+
+def bar_workforce(snap, borough=None):
+    px = import_module("plotly.express")
+    return px.bar(results(snap, "work_data", borough=borough), x='Year', y=['Were accepted and enrolled', 'Placed into full-time or part-time jobs'], title="NYCHA Residents that enrolled/benefited from Workforce 1 Program ", barmode='group', height=600)
+
+def pie_services(snap):
+    go = import_module("plotly.graph_objects")
+    labels = ["Financial Services", "SNAP", "Cash Assistance", "Workforce 1", "Summer Youth"]
+    fig = go.Figure(data=[go.Pie(labels=labels, values=snap.pie_data)])
+    fig.update_layout(title="Percentage of Enrollment per Service/Program")
+    return fig
+
+def pie_financial(snap):
+    go = import_module("plotly.graph_objects")
+    fig = go.Figure(data=[go.Pie(labels=FIN_COLUMNS, values=snap.pie_data1, marker_colors=["#FF97FF", "#FECB52", "#B6E880", "#FF6692", "#19D3F3", "#FFA15A"])])
+    fig.update_layout(title="Percentage of Enrollment by Financial Services",uniformtext_minsize=12, uniformtext_mode='hide')
+    return fig
+
+def scatter_trends(snap):
+    px = import_module("plotly.express")
+    go = import_module("plotly.graph_objects")
+    df = snap.trend_series
+    fits = snap.trend_fits
+    lines = trend.project(fits, df.index)
+    fig = px.scatter(df, x=df.index, y=list(df.columns))
+    for points in list(fig.data):
+        name = points.name
+        fig.add_trace(go.Scatter(x=lines.index, y=lines[name], mode="lines", line_color=points.marker.color, legendgroup=points.legendgroup,
+                                 showlegend=False, name=name, hovertemplate=f"{name} trend<br>R²={fits.loc[name, 'r2']:.3f}<br>Year=%{{x}}<br>Enrollment=%{{y:.0f}}<extra></extra>"))
+    fig.update_layout(
+    title="Regression line For Each Service/Program",
+    xaxis_title="Year",
+    yaxis_title="Enrollment",
+    legend_title="Service/Program")
+    fig.update_traces(marker_size=10)
+    return fig
+
+def histogram_acceptance(snap):
+    px = import_module("plotly.express")
+    rates = snap.development_rates.dropna(subset=["Acceptance rate"])
+    fig = px.histogram(rates, x="Acceptance rate", color=rates["Year"].astype(str), nbins=20, barmode="overlay", opacity=0.6,
+                       title="Acceptance Rate of the Summer Youth Program per NYCHA Development")
+    fig.update_layout(xaxis_tickformat=".0%", yaxis_title="Developments", legend_title="Year")
+    return fig
+
+#the n developments whose accepted residents grew and shrank the most since the previous year, the latest year by default
+def bar_development_changes(snap, year=None, n=10):
+    px = import_module("plotly.express")
+    changes = results(snap, "development_changes", year=year)
+    if year is None and len(changes):
+        changes = changes[changes["Year"] == changes["Year"].max()]
+    movers = pd.concat([changes.nlargest(n, "Accepted change"), changes.nsmallest(n, "Accepted change")]).drop_duplicates("NYCHA Development")
+    movers = movers.sort_values("Accepted change")
+    title = "Summer Youth Developments with the Largest Change in Accepted Residents"
+    if len(changes):
+        title += f", {changes['Previous year'].iloc[0]} to {changes['Year'].iloc[0]}"
+    fig = px.bar(movers, x="Accepted change", y="NYCHA Development", orientation="h", title=title,
+                 hover_data=["Applied for the program", "Were accepted and enrolled", "Acceptance rate change"], height=200 + 25 * len(movers))
+    return fig
+
+FIGURES = {
+    "fig0": bar_snap,
+    "fig": bar_summer_youth,
+    "fig1": bar_financial_enrolled,
+    "fig12": bar_financial_beneficial,
+    "fig01": bar_workforce,
+    "fig03": pie_services,
+    "fig04": pie_financial,
+    "fig09": scatter_trends,
+    "fig05": histogram_acceptance,
+    "fig06": bar_development_changes,
+}
+
+#every chart is built once per data version, chart id and filters (a sorted tuple of (name, value) pairs), reruns only
+#hand the cached figure back, it is built from the snapshot of that version so a figure never mixes two versions
+@memoize(max_entries=256, ttl=None)
+def cached_figure(chart_id, version, filters, data_dir=data.DATA_DIR):
+    return FIGURES[chart_id](snapshot.at(version, data_dir), **dict(filters))
+
+
+#Conclusions ################
+CONCLUSIONS = {
+    "snap": """
+        For each year, both the SNAP and Cash Assistance programs decline. These two programs are shown to be the
+        most commonly used by NYCHA residents. This could mean that there is not enough funding to continue to assist the residents with this service
+        even when it is in high demand.
+    """,
+    "summer_youth": """
+        The number of residents who applied for the Summer Youth program declined between 2018 and 2019, however, the
+        amount that was accepted stayed close to the same. This could mean that there is a limited amount of spots
+        available for NYCHA residents.
+    """,
+    "financial": """
+        This displays all the programs that fall under Financial services.
+        This graph shows that the financial service program with the most enrollment and the most reports about it being beneficial was the 'Empowerment Center Program'. This program
+        is also increasing throughout the years unlike the other programs listed in Financial services. This means that this
+        program is in high demand for NYCHA residents and should be given funding in order to keep it going.
+    """,
+    "workforce": """
+        This shows the significant difference between the number of residents that enroll in the Workforce 1 program and the number who are placed into full-time jobs.
+        This demonstrates that while the enrollment rate is not decreasing, there should be greater demand for the program to
+        aid residents in finding jobs.
+    """,
+    "pie_charts": """
+        These charts show the percentage of enrollment for each Service/program. On the first chart, 'SNAP', 'Cash Assistance' and
+        'Workforce 1' has the highest enrollment rates. 'Financial Services' is of very low percentage so I broke down the services that fall
+        under it on the hart to the right. Here we can tell that the financial services with the most enrollment are 'Empowerment Center Program', 'Residents CAN!', and 'Ready to Rent'.
+        This tells us that these services are in high demand, on top of that these services were also reported as most beneficial to the residents. Therefore funding should go to these
+        programs (or programs similar to this) for NYCHA residents.
+
+    """,
+    "trend_lines": """
+        By grouping the enrollment for each service by year we can see that most of the Services
+        and Programs have been declining yearly. The linear trends for each service/program also showcase this.
+        SNAP and Cash Assistance programs have the highest enrollment, while Summer Youth, Financial Services, and Workforce 1 do
+        not have data to show for past 2019. However, those 3 services were the only ones to have an enrollment increase between a year
+        or two. Financial services and Workforce 1 have a significant decrease in enrollment in  2018. This could mean that the services
+        were not as available to residents due to budget cutbacks. In 2019, you see the enrollments spike up again, showing that
+        these services are useful to the residents.
+    """,
+}
@@ -0,0 +1,128 @@
+import concurrent.futures
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+import profiling
+
+#process-wide memoization for the loaders and derivations in app1.py
+#unlike the old st.cache it never hashes or copies the returned value, so callers must treat results as read-only
+DEFAULT_MAX_ENTRIES = 16
+DEFAULT_TTL = 60 * 60  #seconds, so a changed csv is picked up within the hour even without a restart
+
+_registry = {}
+
+
+class Memo:
+    def __init__(self, func, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.func = func
+        self.name = func.__module__ + "." + func.__qualname__
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  #key -> (time stored, value), oldest first
+        self.pending = {}  #key -> Future of a miss that is being computed
+        self.generation = 0  #bumped by clear()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compute_time = 0.0
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        with profiling.span(self.name) as attributes:
+            #the lock only guards the lookup and the insert, a miss computes outside it so hits on other keys never wait
+            #callers missing the same key at once share one future and the first of them computes it
+            with self.lock:
+                now = time.monotonic()
+                entry = self.entries.get(key)
+                if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    attributes["cache"] = "hit"
+                    return entry[1]
+                pending = self.pending.get(key)
+                if pending is not None:
+                    self.hits += 1
+                    attributes["cache"] = "hit"
+                    attributes["waited"] = True
+                else:
+                    pending = self.pending[key] = concurrent.futures.Future()
+                    generation = self.generation
+                    self.misses += 1
+                    attributes["cache"] = "miss"
+            if attributes.get("waited"):
+                return pending.result()
+            try:
+                start = time.perf_counter()
+                value = self.func(*args, **kwargs)
+                elapsed = time.perf_counter() - start
+            except BaseException as error:
+                with self.lock:
+                    if self.pending.get(key) is pending:
+                        del self.pending[key]
+                pending.set_exception(error)
+                raise
+            with self.lock:
+                self.compute_time += elapsed
+                if self.pending.get(key) is pending:
+                    del self.pending[key]
+                if generation == self.generation:  #not stored when clear() ran meanwhile, it may be from the old data
+                    self.entries[key] = (now, value)
+                    self.entries.move_to_end(key)
+                    while len(self.entries) > self.max_entries:
+                        self.entries.popitem(last=False)
+                        self.evictions += 1
+            pending.set_result(value)
+            return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.pending.clear()
+            self.generation += 1
+
+    def stats(self):
+        calls = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / calls if calls else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "compute_time": self.compute_time,
+        }
+
+
+def _signature(func, max_entries, ttl):
+    code = func.__code__
+    return code.co_code, code.co_consts, code.co_names, max_entries, ttl
+
+
+#use as @memoize or @memoize(max_entries=..., ttl=...), ttl=None keeps entries until they are evicted
+def memoize(func=None, *, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+    def wrap(func):
+        #streamlit re-executes the script on every rerun, so hand back the existing cache unless the function body
+        #(its bytecode, constants and names, so an edited string or sql text counts) or the decorator arguments changed
+        name = func.__module__ + "." + func.__qualname__
+        memo = _registry.get(name)
+        if memo is None or _signature(memo.func, memo.max_entries, memo.ttl) != _signature(func, max_entries, ttl):
+            memo = Memo(func, max_entries=max_entries, ttl=ttl)
+            _registry[name] = memo
+        memo.func = func  #same code, but it should see this run's globals
+        return memo
+    if func is not None:
+        return wrap(func)
+    return wrap
+
+
+#hit/miss/compute-time counters for every memoized function, keyed by function name
+def stats():
+    return {name: memo.stats() for name, memo in _registry.items()}
+
+
+def clear():
+    for memo in _registry.values():
+        memo.clear()
@@ -0,0 +1,47 @@
+import concurrent.futures
+import logging
+import os
+import time
+
+import profiling
+
+#runs the independent loading and cleaning stages of a cold start side by side on a thread pool
+#threads rather than processes: the stages hand DataFrames to each other and fill the memo and feather caches of
+#this process, and read_csv, feather and sqlite spend most of their time outside the GIL
+WORKERS = min(8, os.cpu_count() or 1)
+
+log = logging.getLogger("pipeline")
+
+
+#run every stage of stages (name -> (func, names of the stages it needs)) and return (results, seconds) by stage name
+#a stage is submitted as soon as all the stages it needs have finished, the first failing stage raises its error here
+def run(stages, workers=WORKERS):
+    for name, (func, needs) in stages.items():
+        missing = [need for need in needs if need not in stages]
+        if missing:
+            raise ValueError(f"stage {name!r} needs unknown stages {missing}")
+    results, seconds = {}, {}
+    pending = dict(stages)
+    running = {}
+
+    def timed(name, func):
+        start = time.perf_counter()
+        with profiling.span("stage", stage=name):
+            value = func()
+        seconds[name] = time.perf_counter() - start
+        return value
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        while pending or running:
+            for name, (func, needs) in list(pending.items()):
+                if all(need in results for need in needs):
+                    running[pool.submit(profiling.in_context(timed), name, func)] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"stages {sorted(pending)} depend on each other")
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                log.info("stage %s took %.0f ms", name, seconds[name] * 1000)
+    return results, seconds
@@ -0,0 +1,330 @@
+import fnmatch
+import functools
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+import profiling
+
+#cleaned frames are written to a .cache directory next to the csv files so a cold start reads them back column by column
+#instead of parsing and cleaning the csv again, the read converts to pandas and so still copies every column into memory
+DATA_DIR = "./Datasets"
+CACHE_DIR = ".cache"
+CACHE_VERSION = 7  #bump this when the schemas or any of the cleaning functions below change
+NA_VALUES = ["", "N/A", "NA"]
+
+#which csv files feed which dataset, a new year's extract is picked up as soon as its name matches one of these
+SOURCES = {
+    "summer_youth": "SummerYouth*.csv",
+    "snap": "SNAPandCASH*.csv",
+    "workforce": "Workforce_1*.csv",
+    "financial": "*Financial_Services*.csv",
+}
+
+#declared dtypes per dataset: the label columns become categories, the wage columns are parsed from strings like
+#"$   13.02" into float32, Year is int16 and every other column is a count stored as a nullable Int32
+SCHEMAS = {
+    "summer_youth": {"categories": ["NYCHA Development"], "wages": ["Average wage of residents"]},
+    "snap": {"categories": ["Borough"], "wages": []},
+    "workforce": {"categories": ["Borough"], "wages": ["Average Wage"]},
+    "financial": {"categories": ["Borough"], "wages": []},
+}
+DEFAULT_SCHEMA = {"categories": ["Borough", "NYCHA Development"], "wages": []}
+CHUNKSIZE = 50_000  #rows per chunk when a csv is streamed instead of read whole
+
+
+#size, mtime and content hash of a source csv
+def fingerprint(path, with_hash=True):
+    stat = os.stat(path)
+    result = {"path": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        result["sha256"] = digest.hexdigest()
+    return result
+
+
+#the dataset a csv belongs to according to SOURCES, None for files the app does not use
+def dataset_of(filename):
+    name = os.path.basename(filename).lower()
+    for dataset, pattern in SOURCES.items():
+        if fnmatch.fnmatch(name, pattern.lower()):
+            return dataset
+    return None
+
+
+#every csv of dataset in data_dir, sorted by name
+def sources(dataset, data_dir=DATA_DIR):
+    return [os.path.join(data_dir, filename) for filename in sorted(os.listdir(data_dir)) if filename.endswith(".csv") and dataset_of(filename) == dataset]
+
+
+#cheap id of the current contents of Datasets/, it changes whenever a csv is added, removed or rewritten
+def data_version(data_dir=DATA_DIR):
+    digest = hashlib.sha256()
+    for filename in sorted(os.listdir(data_dir)):
+        if filename.endswith(".csv"):
+            stat = os.stat(os.path.join(data_dir, filename))
+            digest.update(f"{filename}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+#the cache entry is still good when every source has the same size and mtime, or when only the mtime moved but the content hash is the same
+def _is_fresh(meta, sources):
+    if meta.get("version") != CACHE_VERSION or len(meta.get("sources", [])) != len(sources):
+        return False
+    touched = False
+    for old, path in zip(meta["sources"], sources):
+        new = fingerprint(path, with_hash=False)
+        if old["path"] != new["path"] or old["size"] != new["size"]:
+            return False
+        if old["mtime"] != new["mtime"]:
+            if old["sha256"] != fingerprint(path)["sha256"]:
+                return False
+            touched = True
+    if touched:
+        meta["sources"] = [fingerprint(path) for path in sources]
+        _write_meta(meta["name"], meta)
+    return True
+
+
+def _paths(name, sources):
+    cache_dir = os.path.join(os.path.dirname(sources[0]), CACHE_DIR)
+    return os.path.join(cache_dir, name + ".feather"), os.path.join(cache_dir, name + ".json")
+
+
+#temporary name for a cache file being written, unique per thread since the loaders run concurrently
+def _tmp(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _write_meta(name, meta):
+    meta_path = _paths(name, [source["path"] for source in meta["sources"]])[1]
+    with open(_tmp(meta_path), "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(_tmp(meta_path), meta_path)
+
+
+#return the frame stored under name, calling build() and rewriting the cache entry only when one of the sources changed
+def cached_frame(name, sources, build):
+    frame_path, meta_path = _paths(name, sources)
+    with profiling.span("cached_frame", frame=name) as attributes:
+        if os.path.exists(frame_path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if _is_fresh(meta, sources):
+                attributes["cache"] = "hit"
+                return feather.read_feather(frame_path, memory_map=True)  #mapped so arrow reads no extra copy of the file
+        attributes["cache"] = "miss"
+        df = build().reset_index(drop=True)
+        os.makedirs(os.path.dirname(frame_path), exist_ok=True)
+        feather.write_feather(df, _tmp(frame_path), compression="uncompressed")  #uncompressed so the read skips decompression
+        os.replace(_tmp(frame_path), frame_path)
+        _write_meta(name, {"name": name, "version": CACHE_VERSION, "sources": [fingerprint(path) for path in sources]})
+        return df
+
+
+def parse_wage(text):
+    text = text.replace("$", "").replace(",", "").strip()
+    if text in NA_VALUES:
+        return np.nan
+    return float(text)
+
+
+#read_csv arguments that apply the schema of filename while parsing, dtype entries in overrides win
+def read_options(filename, usecols=None, **overrides):
+    schema = SCHEMAS.get(dataset_of(filename), DEFAULT_SCHEMA)
+    columns = pd.read_csv(filename, nrows=0).columns
+    if usecols is not None:
+        columns = [col for col in columns if col in usecols]
+    dtype, converters = {}, {}
+    for col in columns:
+        if col == "Year":
+            dtype[col] = "int16"
+        elif col in schema["categories"]:
+            dtype[col] = "category"
+        elif col in schema["wages"]:
+            converters[col] = parse_wage
+        else:
+            dtype[col] = "Int32"
+    dtype.update(overrides.pop("dtype", {}))
+    return dict(usecols=usecols, dtype=dtype, converters=converters, na_values=NA_VALUES, **overrides)
+
+
+def read_csv(filename, **kwargs):
+    options = read_options(filename, **kwargs)
+    df = pd.read_csv(filename, **options)
+    for col in options["converters"]:
+        df[col] = df[col].astype("float32")
+    return df
+
+
+#rows, columns and deep memory use in MB of each frame in frames (name -> DataFrame)
+def memory_report(frames):
+    rows = [{"frame": name, "rows": len(df), "columns": df.shape[1], "MB": df.memory_usage(deep=True).sum() / 2**20} for name, df in frames.items()]
+    return pd.DataFrame(rows).set_index("frame")
+
+
+#Summer Youth without the columns the app never uses and without the 'Totals' row
+def clean_summer_youth(df):
+    dropCols = ['Average wage of residents','Enrolled in financial counseling services through the program','Enrolled in college-readiness courses or participated in college-readiness activities through the program']
+    df = df.drop(columns=dropCols)
+    df = df[df['NYCHA Development'] != 'Totals']
+    df['NYCHA Development'] = df['NYCHA Development'].cat.remove_unused_categories()
+    return df
+
+
+#Workforce 1 without the 'Unknown' borough, with the placement columns summed into one
+def clean_workforce(df):
+    df = df[df['Borough'] != 'Unknown']
+    dropCols = ['Applied for the program','Average Wage','Enrolled in college-readiness courses or participated in college-readiness activities through the program']
+    df = df.drop(columns=dropCols)
+    df['Placed into full-time or part-time jobs'] = df.iloc[:, 3:8].sum(axis=1).astype("Int32")
+    df = df.drop(columns=df.columns[3:8])
+    df['Borough'] = df['Borough'].cat.remove_unused_categories()
+    return df
+
+
+#spellings of borough names that differ between the files
+BOROUGH_FIXES = {"Mahattan": "Manhattan"}
+
+
+#Summer Youth streamed chunk by chunk, keeping only the running applied/enrolled sums per year and development,
+#so memory follows the number of developments rather than the size of the file
+def aggregate_summer_youth(filename, chunksize=CHUNKSIZE):
+    keys = ['Year', 'NYCHA Development']
+    counts = ['Applied for the program', 'Were accepted and enrolled']
+    totals = None
+    #developments stay plain strings while streaming, the categories of separate chunks would not line up
+    options = read_options(filename, usecols=keys + counts, dtype={'NYCHA Development': str}, chunksize=chunksize)
+    #a blank development still counts towards its year, it is summed under "" (NaN keys would not align or sort with
+    #the names) and stored as missing again at the end
+    for chunk in pd.read_csv(filename, **options):
+        chunk = chunk[chunk['NYCHA Development'] != 'Totals'].fillna({'NYCHA Development': ''})
+        part = chunk.groupby(keys, sort=False)[counts].sum()
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    totals = totals.sort_index().reset_index()
+    totals['NYCHA Development'] = totals['NYCHA Development'].replace('', np.nan).astype('category')
+    return totals
+
+
+#the financial services files word the same measures differently and each year has its own set of programs,
+#every header is mapped onto a canonical (program, metric) pair by the text it contains
+FIN_PROGRAMS = {
+    "Empowerment Center Program": "Empowerment Center Program",
+    "Residents CAN!": "CAN!",
+    "La Ventanilla": "La Ventanilla",
+    "Ready to Rent": "Ready to Rent",
+    "EmpoweredNYC": "EmpoweredNYC",
+    "Student Loan Debt Clinic": "Student Loan Debt Clinic",
+}
+#"enrolled" is the counseling/banking count, every other metric is something residents reported as beneficial
+FIN_METRICS = {
+    "enrolled": "received financial counseling or banking services",
+    "credit scores improved": "reported that their credit scores were improved",
+    "credit scores up 35 points": "increased their credit scores by at least 35 points",
+    "debt reduced": "reported that their debt was reduced",
+    "debt down 10%": "decreased debt by at least 10%",
+    "savings increased (reported)": "reported that their savings increased",
+    "savings increased": "increased savings",
+}
+LONG_COLUMNS = ["Year", "Borough", "program", "metric", "value"]
+
+
+def _match(col, texts):
+    for name, text in texts.items():
+        if text in col:
+            return name
+    return None
+
+
+#(program, metric) of every count column in a financial services header, a column that maps onto neither is an error
+#so a reworded header in a new extract is noticed at ingest instead of silently dropping out of the sums
+def fin_columns(columns):
+    pairs = {}
+    for col in columns:
+        if col in ("Year", "Borough"):
+            continue
+        program, metric = _match(col, FIN_PROGRAMS), _match(col, FIN_METRICS)
+        if program is None or metric is None:
+            raise ValueError(f"unrecognized financial services column {col!r}")
+        pairs[col] = (program, metric)
+    return pairs
+
+
+#one financial services file in the canonical long format, one row per year, borough, program and metric
+#empty cells carry no row, so programs or metrics a year did not report simply have nothing to sum
+def financial_long_format(df):
+    pairs = fin_columns(df.columns)
+    df = df.assign(Borough=df['Borough'].astype(object).replace(BOROUGH_FIXES))  #object keeps a missing borough missing
+    long = df.melt(id_vars=['Year', 'Borough'], value_vars=list(pairs), var_name='column', value_name='value').dropna(subset=['value'])
+    long['program'] = long['column'].map({col: program for col, (program, metric) in pairs.items()})
+    long['metric'] = long['column'].map({col: metric for col, (program, metric) in pairs.items()})
+    long = long.astype({'Borough': 'category', 'program': 'category', 'metric': 'category', 'value': 'Int32'})
+    return long[LONG_COLUMNS]
+
+
+def _name(filename, kind):
+    return os.path.splitext(os.path.basename(filename))[0] + kind
+
+
+def raw(filename):
+    return cached_frame(_name(filename, ""), [filename], lambda: read_csv(filename))
+
+
+def summer_youth(filename=os.path.join(DATA_DIR, "SummerYouth.csv")):
+    return cached_frame(_name(filename, ".clean"), [filename], lambda: clean_summer_youth(read_csv(filename)))
+
+
+#applied/enrolled per year and NYCHA development
+def summer_youth_developments(filename=os.path.join(DATA_DIR, "SummerYouth.csv")):
+    return cached_frame(_name(filename, ".developments"), [filename], lambda: aggregate_summer_youth(filename))
+
+
+def workforce(filename=os.path.join(DATA_DIR, "Workforce_1.csv")):
+    return cached_frame(_name(filename, ".clean"), [filename], lambda: clean_workforce(read_csv(filename)))
+
+
+def financial_long(filename):
+    return cached_frame(_name(filename, ".long"), [filename], lambda: financial_long_format(read_csv(filename)))
+
+
+#the rows one source file contributes to its table in the sqlite store
+def partition(dataset, filename):
+    if dataset == "snap":
+        return raw(filename)[['Year', 'Borough', 'Received benefits under SNAP', 'Received benefits under Cash Assistance']]
+    if dataset == "workforce":
+        return workforce(filename)
+    if dataset == "financial":
+        return financial_long(filename)
+    if dataset == "summer_youth":
+        return summer_youth_developments(filename)
+    raise ValueError(f"unknown dataset {dataset!r}")
+
+
+#python preprocess.py rebuilds every stale entry ahead of time, e.g. after dropping new extracts into Datasets/
+if __name__ == "__main__":
+    import pipeline
+    stages = {}
+    for filename in sorted(os.listdir(DATA_DIR)):
+        if filename.endswith(".csv"):
+            stages[filename] = (functools.partial(raw, os.path.join(DATA_DIR, filename)), [])
+    stages["SummerYouth.clean"] = (summer_youth, [])
+    for dataset in SOURCES:
+        for filename in sources(dataset):
+            stages[_name(filename, "." + dataset)] = (functools.partial(partition, dataset, filename), [])
+    frames, seconds = pipeline.run(stages)
+    plain = {}
+    for filename in sorted(os.listdir(DATA_DIR)):
+        if filename.endswith(".csv"):
+            plain[filename] = pd.read_csv(os.path.join(DATA_DIR, filename))
+    report = memory_report(frames)
+    report["MB without schema"] = memory_report(plain)["MB"]
+    report["build seconds"] = pd.Series(seconds)
+    print(report.round(3).to_string())
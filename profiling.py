@@ -0,0 +1,89 @@
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import threading
+import time
+
+#timing spans around the loaders, derivations and chart builds
+#a span is a dict shaped like an OpenTelemetry span (trace_id, span_id, parent_id, name, start, duration, attributes),
+#every finished span is logged as one json line at DEBUG level and, during a streamlit rerun, kept on that rerun's Trace
+log = logging.getLogger("profiling")
+
+_ids = itertools.count(1)
+_trace = contextvars.ContextVar("trace", default=None)
+_parent = contextvars.ContextVar("parent", default=None)
+
+
+class Trace:
+    def __init__(self):
+        self.trace_id = next(_ids)
+        self.start = time.perf_counter()
+        self.spans = []  #finished spans, a child is appended before its parent
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+#start collecting the spans of the current thread (and the pool threads it hands work to) into a new Trace
+def start_trace():
+    trace = Trace()
+    _trace.set(trace)
+    _parent.set(None)
+    return trace
+
+
+#with span("name", key=value) as attributes: ... times the block, attributes can still be added inside it
+#spans are skipped entirely when there is no trace to keep them and DEBUG logging is off
+@contextlib.contextmanager
+def span(name, **attributes):
+    trace = _trace.get()
+    if trace is None and not log.isEnabledFor(logging.DEBUG):
+        yield attributes
+        return
+    span_id = next(_ids)
+    parent_id = _parent.get()
+    token = _parent.set(span_id)
+    wall = time.time()
+    start = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        duration = time.perf_counter() - start
+        _parent.reset(token)
+        record = {
+            "trace_id": trace.trace_id if trace else None,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start": wall,
+            "offset_ms": (start - trace.start) * 1000 if trace else None,
+            "duration_ms": duration * 1000,
+            "thread": threading.current_thread().name,
+            "attributes": attributes,
+        }
+        if trace is not None:
+            trace.spans.append(record)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(json.dumps(record, default=str))
+
+
+#send the INFO records of the named loggers to stderr, nothing else configures logging under streamlit run, which
+#only sets up its own "streamlit" logger, so without this the timings logged at INFO would be dropped
+#streamlit re-executes the script on every rerun, a logger that already has a handler is left as it is
+def configure_logging(*names, level=logging.INFO):
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+    for name in names:
+        logger = logging.getLogger(name)
+        if not logger.handlers:
+            logger.addHandler(handler)
+        if logger.level == logging.NOTSET:
+            logger.setLevel(level)
+
+
+#run func(*args) in a copy of the caller's context, so spans opened in a worker thread join the caller's trace
+def in_context(func):
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
@@ -0,0 +1,101 @@
+import collections
+import functools
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data
+import pipeline
+import preprocess
+import profiling
+import store
+
+#process-wide analytics snapshot: the unfiltered results of data.py for one data version, built once and shared read-only
+#by every streamlit session in the process, a rerun takes current() once and reads everything from that one object
+#every field is built by the data.py function of that name, after the fields it reads (and the sqlite store) are ready
+FIELDS = {
+    "sc_data": ["database"],
+    "work_data": ["database"],
+    "financial_result1": ["database"],
+    "financial_result2": ["database"],
+    "year_sum": ["database"],
+    "boroughs": ["database"],
+    "developments": ["database"],
+    "combineFin": ["financial_result1"],
+    "pie_data": ["financial_result1", "sc_data", "work_data", "year_sum"],
+    "pie_data1": ["financial_result1"],
+    "trend_series": ["sc_data", "year_sum", "combineFin", "work_data"],
+    "trend_fits": ["trend_series"],
+    "development_rates": ["database"],
+    "acceptance_summary": ["development_rates"],
+    "development_changes": ["database"],
+}
+Snapshot = collections.namedtuple("Snapshot", ["version", "data_dir", *FIELDS])
+
+_lock = threading.Lock()
+_current = {}  #data_dir -> Snapshot of the data version last seen there
+_previous = {}  #data_dir -> the Snapshot it replaced, sessions that took it before the swap may still be reading it
+
+
+#a copy of one column, plain numpy columns are marked read-only while extension arrays (nullable integers,
+#categories) are copied as they are, converting them to numpy would change their dtype
+def _readonly(values):
+    values = values.copy()
+    if isinstance(values, np.ndarray):
+        values.flags.writeable = False
+    return values
+
+
+#a copy of df with the same dtypes whose numpy columns reject in-place writes, so a session cannot change what the others see
+def freeze(df):
+    return pd.DataFrame({col: _readonly(df[col].values) for col in df.columns}, index=df.index.copy(), copy=False)
+
+
+def _frozen(value):
+    if isinstance(value, pd.DataFrame):
+        return freeze(value)
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+#independent fields are computed side by side, the wall time of every stage is logged by pipeline.run
+def build(data_dir=data.DATA_DIR, version=None):
+    version = version or preprocess.data_version(data_dir)
+    with profiling.span("snapshot.build", version=version):
+        stages = {"database": (functools.partial(store.database, data_dir), [])}
+        for name, needs in FIELDS.items():
+            stages[name] = (functools.partial(getattr(data, name), data_dir), needs)
+        results, _ = pipeline.run(stages)
+        return Snapshot(version, data_dir, *[_frozen(results[name]) for name in FIELDS])
+
+
+#the snapshot of the current contents of data_dir, the first caller after the csv files change builds the new one
+#and swaps it in with a single assignment, sessions arriving meanwhile keep reading the old one instead of waiting
+def current(data_dir=data.DATA_DIR):
+    version = preprocess.data_version(data_dir)
+    snap = _current.get(data_dir)
+    if snap is not None and snap.version == version:
+        return snap
+    if not _lock.acquire(blocking=snap is None):
+        return snap
+    try:
+        snap = _current.get(data_dir)
+        if snap is None or snap.version != version:
+            data.refresh(data_dir)
+            snap = build(data_dir, version)
+            if data_dir in _current:
+                _previous[data_dir] = _current[data_dir]
+            _current[data_dir] = snap
+        return snap
+    finally:
+        _lock.release()
+
+
+#the snapshot of one data version of data_dir, for caches that are keyed on the version instead of holding the snapshot
+def at(version, data_dir=data.DATA_DIR):
+    for snap in (_current.get(data_dir), _previous.get(data_dir)):
+        if snap is not None and snap.version == version:
+            return snap
+    raise LookupError(f"the snapshot of data version {version} of {data_dir} is no longer kept")
@@ -0,0 +1,148 @@
+import contextlib
+import functools
+import os
+import pathlib
+import sqlite3
+import threading
+
+import pandas as pd
+
+import pipeline
+import preprocess
+import profiling
+
+#embedded sqlite copy of the cleaned datasets that the derivations in data.py query, one file per data directory
+#it lives in the same .cache directory as the feather files, every table holds one partition of rows per source csv
+#and only the partitions of new or changed files are recomputed when preprocess.data_version() moves
+DB_NAME = "nycha.sqlite"
+STORE_VERSION = 4  #bump when the table layout or the indexes change, the database is then rebuilt from scratch
+#the filter column leads the second index of every table, so a borough or development filter is a SEARCH on it
+#rather than a scan of the year index, Year follows so the matching rows come out grouped by year
+INDEXES = {
+    "snap": [["Year", "Borough"], ["Borough", "Year"]],
+    "workforce": [["Year", "Borough"], ["Borough", "Year"]],
+    "financial": [["Year", "Borough"], ["Borough", "Year"]],
+    "summer_youth": [["Year", "NYCHA Development"], ["NYCHA Development", "Year"]],
+}
+
+_lock = threading.Lock()
+_fresh = {}  #data_dir -> data version the database file was last checked against
+
+
+#source csv name -> (dataset, path, size, mtime) for every csv in data_dir that feeds a table
+def _sources(data_dir):
+    sources = {}
+    for dataset in preprocess.SOURCES:
+        for path in preprocess.sources(dataset, data_dir):
+            stat = preprocess.fingerprint(path, with_hash=False)
+            sources[os.path.basename(path)] = (dataset, path, stat["size"], stat["mtime"])
+    return sources
+
+
+#the tables hold the cleaned frames of preprocess.py, so a change to the cleaning rebuilds them as well
+def _store_version():
+    return f"{STORE_VERSION}.{preprocess.CACHE_VERSION}"
+
+
+def _insert(con, name, df):
+    df = df.astype(object)  #categories keep their missing values as NaN, which become NULL below
+    df = df.where(df.notna(), None)
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    con.execute(f'CREATE TABLE IF NOT EXISTS "{name}" ({columns})')
+    for i, index in enumerate(INDEXES[name]):
+        indexed = ", ".join(f'"{col}"' for col in index)
+        con.execute(f'CREATE INDEX IF NOT EXISTS "{name}_index{i}" ON "{name}" ({indexed})')
+    con.execute(f'CREATE INDEX IF NOT EXISTS "{name}_source" ON "{name}" (source)')
+    placeholders = ", ".join("?" for _ in df.columns)
+    con.executemany(f'INSERT INTO "{name}" ({columns}) VALUES ({placeholders})', df.itertuples(index=False, name=None))
+
+
+#bring the database in line with the csv files: drop the partitions of removed or changed files and load the new ones
+#everything happens in one write transaction, so readers see either the old or the new data, never a mix
+def _update(db_path, data_dir, version):
+    sources = _sources(data_dir)
+    with contextlib.closing(sqlite3.connect(db_path, isolation_level=None)) as con:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            con.execute("CREATE TABLE IF NOT EXISTS partitions (source TEXT PRIMARY KEY, dataset TEXT, size INTEGER, mtime INTEGER)")
+            stored = {source: (dataset, size, mtime) for source, dataset, size, mtime in con.execute("SELECT * FROM partitions")}
+            tables = {row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for source, (dataset, size, mtime) in stored.items():
+                current = sources.get(source)
+                if current is None or current[0] != dataset or current[2:] != (size, mtime):
+                    if dataset in tables:
+                        con.execute(f'DELETE FROM "{dataset}" WHERE source = ?', (source,))
+                    con.execute("DELETE FROM partitions WHERE source = ?", (source,))
+                    stored[source] = None
+            #the new partitions are read and cleaned side by side, sqlite then takes them one at a time
+            stale = {source: (functools.partial(preprocess.partition, dataset, path), []) for source, (dataset, path, size, mtime) in sources.items()
+                     if stored.get(source) is None}
+            frames, _ = pipeline.run(stale)
+            for source in stale:
+                dataset, path, size, mtime = sources[source]
+                _insert(con, dataset, frames[source].assign(source=source))
+                con.execute("INSERT INTO partitions VALUES (?, ?, ?, ?)", (source, dataset, size, mtime))
+            con.execute("INSERT OR REPLACE INTO meta VALUES ('data_version', ?)", (version,))
+            con.execute("INSERT OR REPLACE INTO meta VALUES ('store_version', ?)", (_store_version(),))
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+
+
+def _connect_read_only(db_path):
+    return contextlib.closing(sqlite3.connect(pathlib.Path(db_path).resolve().as_uri() + "?mode=ro", uri=True))
+
+
+def _meta(db_path):
+    if not os.path.exists(db_path):
+        return {}
+    with _connect_read_only(db_path) as con:
+        try:
+            return dict(con.execute("SELECT key, value FROM meta"))
+        except sqlite3.Error:
+            return {}
+
+
+#path of the database for data_dir, brought up to date first if the csv files changed since it was last written
+def database(data_dir=preprocess.DATA_DIR):
+    db_path = os.path.join(data_dir, preprocess.CACHE_DIR, DB_NAME)
+    version = preprocess.data_version(data_dir)
+    if _fresh.get(data_dir) != version or not os.path.exists(db_path):
+        with _lock:
+            meta = _meta(db_path)
+            if meta.get("data_version") != version or meta.get("store_version") != _store_version():
+                if meta.get("store_version") != _store_version() and os.path.exists(db_path):
+                    os.remove(db_path)
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                with profiling.span("store.update", version=version):
+                    _update(db_path, data_dir, version)
+            _fresh[data_dir] = version
+    return db_path
+
+
+#run a parameterized query read-only and return the rows as a DataFrame
+def query(sql, params=(), data_dir=preprocess.DATA_DIR):
+    db_path = database(data_dir)
+    with profiling.span("sql", table=_table(sql), params=list(params)) as attributes:
+        with _connect_read_only(db_path) as con:
+            df = pd.read_sql_query(sql, con, params=params)
+        attributes["rows"] = len(df)
+        return df
+
+
+#first table named after FROM in sql, for labelling its span
+def _table(sql):
+    words = sql.split()
+    return next((words[i + 1].strip('"') for i, word in enumerate(words[:-1]) if word.upper() == "FROM"), None)
+
+
+#" AND col = ?" for every filter (column -> value) that is set, with the matching parameters
+def where(filters):
+    clauses, params = [], []
+    for col, value in filters.items():
+        if value is not None:
+            clauses.append(f' AND "{col}" = ?')
+            params.append(value)
+    return "".join(clauses), params
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import preprocess  # noqa: E402
+
+
+#the bundled csv files
+@pytest.fixture
+def datasets():
+    return os.path.join(ROOT, preprocess.DATA_DIR)
@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+import pytest
+
+import preprocess
+
+
+#streaming the csv in chunks of any size sums the same as grouping the whole file read at once, rows without a
+#development included, the blank rows sit in the first and the last chunk so their running sums cross chunks
+@pytest.mark.parametrize("chunksize", [7, 100, 50_000])
+def test_aggregate_summer_youth_chunks(datasets, tmp_path, chunksize):
+    df = pd.read_csv(os.path.join(datasets, "SummerYouth.csv"), dtype=str, keep_default_na=False)
+    blank = df.iloc[[0]].assign(**{"NYCHA Development": "", "Applied for the program": "1000", "Were accepted and enrolled": "500"})
+    filename = tmp_path / "SummerYouth.csv"
+    pd.concat([blank, df, blank]).to_csv(filename, index=False)
+    keys = ["Year", "NYCHA Development"]
+    whole = pd.read_csv(filename, **preprocess.read_options(filename, dtype={"NYCHA Development": str}))
+    whole = whole[whole["NYCHA Development"] != "Totals"]
+    expected = whole.groupby(keys, dropna=False)[["Applied for the program", "Were accepted and enrolled"]].sum().reset_index()
+    assert expected["NYCHA Development"].isna().any()
+    streamed = preprocess.aggregate_summer_youth(filename, chunksize=chunksize).astype({"NYCHA Development": object})
+    pd.testing.assert_frame_equal(streamed.sort_values(keys, ignore_index=True), expected.sort_values(keys, ignore_index=True), check_dtype=False)
+
+
+#every header of the bundled financial services files maps onto a known program and metric
+def test_fin_columns_known_headers(datasets):
+    for path in preprocess.sources("financial", datasets):
+        columns = pd.read_csv(path, nrows=0).columns
+        pairs = preprocess.fin_columns(columns)
+        assert set(pairs) == set(columns) - {"Year", "Borough"}
+        assert {program for program, metric in pairs.values()} <= set(preprocess.FIN_PROGRAMS)
+
+
+#a header that matches no program or no metric raises instead of silently dropping out of the totals
+@pytest.mark.parametrize("column", ["Number of NYCHA residents enrolled in Budget Bootcamp", "Empowerment Center Program: Something new"])
+def test_fin_columns_unknown_header(column):
+    with pytest.raises(ValueError, match="unrecognized financial services column"):
+        preprocess.fin_columns(["Year", "Borough", column])
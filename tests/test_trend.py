@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data
+import trend
+
+
+def noisy_series():
+    rng = np.random.default_rng(0)
+    years = np.arange(2005, 2021)
+    gaps = 50.0 - 2.0 * years + rng.normal(0, 3, len(years))
+    gaps[[1, 4, 5, 12]] = np.nan
+    return pd.DataFrame({
+        "rising": 3.0 * years - 5000 + rng.normal(0, 10, len(years)),
+        "falling": -1000.0 * years + 3e6 + rng.normal(0, 500, len(years)),
+        "gaps": gaps,
+    }, index=pd.Index(years, name="Year"))
+
+
+#the vectorized fit gives what one statsmodels OLS per series gives, on the dashboard's series and on noisy ones with gaps
+@pytest.mark.parametrize("kind", ["noisy", "dashboard"])
+def test_fit_matches_ols(kind, datasets):
+    sm = pytest.importorskip("statsmodels.api")  #installed by tests/requirements.txt, only this check needs it
+    series = noisy_series() if kind == "noisy" else data.trend_series(datasets)
+    fits = trend.fit(series)
+    for name in series.columns:
+        points = series[name].dropna()
+        ols = sm.OLS(points.to_numpy(), sm.add_constant(points.index.to_numpy(dtype=float))).fit()
+        assert fits.loc[name, "intercept"] == pytest.approx(ols.params[0], rel=1e-6)
+        assert fits.loc[name, "slope"] == pytest.approx(ols.params[1], rel=1e-6)
+        assert fits.loc[name, "r2"] == pytest.approx(ols.rsquared, rel=1e-6, abs=1e-9)
+        assert fits.loc[name, "points"] == len(points)
+
+
+#a series with fewer than two points has no trend
+def test_fit_single_point():
+    fits = trend.fit(pd.DataFrame({"one": [np.nan, 5.0, np.nan]}, index=[2017, 2018, 2019]))
+    assert fits.loc["one", "points"] == 1
+    assert np.isnan(fits.loc["one", "slope"])
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+#least-squares trend lines for many yearly series at once, this replaces sklearn's LinearRegression and
+#plotly's statsmodels 'ols' trendline, which fit one series per call and are slow to import
+
+
+#fit value = slope * year + intercept to every column of series (index = years, NaN = missing point)
+#the normal equations of all columns are solved together, a column with fewer than two points gets NaN
+def fit(series):
+    years = series.index.to_numpy(dtype=float)
+    x = years - years.mean()  #centred so the sums stay well conditioned for calendar years
+    y = series.to_numpy(dtype=float).T  #one row per series
+    present = ~np.isnan(y)
+    n = present.sum(axis=1)
+    xs = np.where(present, x, 0.0)
+    ys = np.where(present, y, 0.0)
+    sx, sy = xs.sum(axis=1), ys.sum(axis=1)
+    sxx, sxy = (xs * xs).sum(axis=1), (xs * ys).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        centre = (sy - slope * sx) / n
+        residual = np.where(present, y - (slope[:, None] * x + centre[:, None]), 0.0)
+        spread = np.where(present, y - (sy / n)[:, None], 0.0)
+        r2 = 1 - (residual ** 2).sum(axis=1) / (spread ** 2).sum(axis=1)
+    intercept = centre - slope * years.mean()
+    return pd.DataFrame({"slope": slope, "intercept": intercept, "r2": r2, "points": n}, index=series.columns)
+
+
+#trend value of every fitted series for each of years, one column per series
+def project(fits, years):
+    years = np.asarray(years, dtype=float)
+    values = fits["slope"].to_numpy()[None, :] * years[:, None] + fits["intercept"].to_numpy()[None, :]
+    return pd.DataFrame(values, index=pd.Index(years.astype(int), name="Year"), columns=fits.index)